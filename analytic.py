@@ -0,0 +1,115 @@
+# analytic.py
+#
+# Closed-form steady-state estimates for the queue, as an instant preview
+# before (or instead of) a simulation run:
+#   - M/M/c: Erlang C, exact for Poisson arrivals and exponential service
+#   - M/G/1: Pollaczek-Khinchine, exact for Poisson arrivals, any service
+#   - GI/G/c: Allen-Cunneen approximation, scaling M/M/c by (Ca^2 + Cs^2) / 2
+# estimate() applies them to the simulator's own model. compare() reports how
+# far an estimate is from a simulated summary.
+
+import math
+
+# Above this occupancy finite runs stay far from steady state and the
+# approximations drift, so a full simulation is recommended.
+RELIABLE_OCCUPANCY = 0.9
+
+
+def erlang_c(offered_load, servers):
+    """Probability that an arrival has to wait in an M/M/c queue (offered_load = lambda / mu)."""
+    if offered_load >= servers:
+        return 1.0
+    # Erlang B by its stable recursion, then converted to Erlang C
+    blocking = 1.0
+    for k in range(1, servers + 1):
+        blocking = offered_load * blocking / (k + offered_load * blocking)
+    occupancy = offered_load / servers
+    return blocking / (1 - occupancy + occupancy * blocking)
+
+
+def _result(model, arrival_rate, mean_service, servers, wait, exact):
+    occupancy = arrival_rate * mean_service / servers
+    stable = occupancy < 1
+    return {
+        'model': model,
+        'exact': exact,
+        'stable': stable,
+        'occupancy': occupancy,
+        'avg_wait': wait if stable else math.inf,
+        'queue_length': arrival_rate * wait if stable else math.inf,
+    }
+
+
+def mmc(arrival_rate, mean_service, servers=1):
+    """Erlang C steady state for Poisson arrivals and exponential service times."""
+    offered_load = arrival_rate * mean_service
+    if offered_load >= servers:
+        return _result("M/M/c", arrival_rate, mean_service, servers, math.inf, True)
+    wait = erlang_c(offered_load, servers) * mean_service / (servers - offered_load)
+    return _result("M/M/c", arrival_rate, mean_service, servers, wait, True)
+
+
+def mg1(arrival_rate, mean_service, service_variance):
+    """Pollaczek-Khinchine mean wait for Poisson arrivals and a general service distribution."""
+    occupancy = arrival_rate * mean_service
+    if occupancy >= 1:
+        return _result("M/G/1", arrival_rate, mean_service, 1, math.inf, True)
+    second_moment = service_variance + mean_service ** 2
+    wait = arrival_rate * second_moment / (2 * (1 - occupancy))
+    return _result("M/G/1", arrival_rate, mean_service, 1, wait, True)
+
+
+def gg_c(mean_gap, gap_variance, mean_service, service_variance, servers=1):
+    """Allen-Cunneen approximation for general inter-arrival and service distributions."""
+    arrival_rate = 1 / mean_gap
+    base = mmc(arrival_rate, mean_service, servers)
+    variability = (gap_variance / mean_gap ** 2 + service_variance / mean_service ** 2) / 2
+    return _result("GI/G/c", arrival_rate, mean_service, servers, base['avg_wait'] * variability, False)
+
+
+def _uniform_moments(high):
+    """Mean and variance of a uniform integer on 1..high."""
+    return (1 + high) / 2, (high ** 2 - 1) / 12
+
+
+def estimate(max_arrival, max_service, tellers=1):
+    """Steady-state preview for Simulation's default model.
+
+    Inter-arrival gaps and service times are uniform on 1..max. A teller is
+    only free to start the next customer one minute after a departure, so
+    the occupancy and the queueing formula use service + 1 minute, while the
+    reported utilization counts the busy minutes only, as get_summary does.
+    """
+    mean_gap, gap_variance = _uniform_moments(max_arrival)
+    mean_service, service_variance = _uniform_moments(max_service)
+    result = gg_c(mean_gap, gap_variance, mean_service + 1, service_variance, tellers)
+    # Busy minutes can never exceed the service share of each service + hand-over cycle
+    result['utilization'] = min(mean_service / mean_gap / tellers, mean_service / (mean_service + 1)) * 100
+    result['reliable'] = result['stable'] and result['occupancy'] < RELIABLE_OCCUPANCY
+    return result
+
+
+def compare(analytic, summary):
+    """Differences between an analytic estimate and a simulated get_summary() result."""
+    report = {}
+    for key in ('avg_wait', 'utilization'):
+        predicted, simulated = analytic.get(key), summary[key]
+        if predicted is None:
+            continue
+        error = predicted - simulated
+        report[key] = {
+            'analytic': predicted,
+            'simulated': simulated,
+            'error': error,
+            'relative_error': error / simulated if simulated else math.inf if error else 0.0,
+        }
+    return report
+
+
+def preview_text(analytic):
+    """One-line description of an estimate for the GUI and CLI."""
+    if not analytic['stable']:
+        return f"Unstable: tellers are {analytic['occupancy']:.0%} occupied; the queue grows without bound."
+    note = "" if analytic['reliable'] else " (near saturation; simulate to confirm)"
+    return (f"Expected wait ~{analytic['avg_wait']:.1f} mins, queue ~{analytic['queue_length']:.1f}, "
+            f"utilization ~{analytic['utilization']:.0f}%{note}")
@@ -0,0 +1,105 @@
+# batch.py
+#
+# Vectorized single-teller FIFO simulator. For one server serving in arrival
+# order the wait times follow directly from the arrival and service sequences
+# (Lindley recursion), so a whole run is a handful of NumPy array operations
+# instead of one Customer object and one Python loop iteration per arrival.
+
+import numpy as np
+
+from simulation import build_summary, new_seed
+from stats import SUMMARY_QUANTILES, quantile_key
+
+# The tick engine frees the server one minute after a departure before the next
+# customer is picked up, so consecutive services are separated by this gap.
+HANDOVER_TIME = 1
+
+
+def lindley_waits(arrival_times, service_times, handover=HANDOVER_TIME):
+    """Returns FIFO single-server wait times for sorted arrival times.
+
+    W[n] = max(0, W[n-1] + S[n-1] + handover - (A[n] - A[n-1])) is unrolled into
+    a cumulative sum minus its running minimum, which NumPy evaluates in one pass.
+    """
+    arrival_times = np.asarray(arrival_times, dtype=np.int64)
+    service_times = np.asarray(service_times, dtype=np.int64)
+    if arrival_times.size == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    increments = service_times[:-1] + handover - np.diff(arrival_times)
+    walk = np.concatenate(([0], np.cumsum(increments)))
+    return walk - np.minimum.accumulate(walk)
+
+
+def simulate_fifo(arrival_times, service_times, duration):
+    """Runs one FIFO teller over given arrivals and returns the per-customer arrays.
+
+    Mirrors the cut-off rules of Simulation: only customers arriving before
+    `duration` exist, only those starting before `duration` count as served,
+    and busy time stops accruing at `duration`.
+    """
+    arrival_times = np.asarray(arrival_times, dtype=np.int64)
+    service_times = np.asarray(service_times, dtype=np.int64)
+    keep = arrival_times < duration
+    arrival_times, service_times = arrival_times[keep], service_times[keep]
+
+    wait_times = lindley_waits(arrival_times, service_times)
+    start_times = arrival_times + wait_times
+    served = start_times < duration
+    busy_time = int(np.minimum(service_times[served], duration - start_times[served]).sum())
+
+    return {
+        'arrival_times': arrival_times,
+        'service_times': service_times,
+        'start_times': start_times,
+        'wait_times': wait_times,
+        'served': served,
+        'total_busy_time': busy_time,
+    }
+
+
+class BatchSimulation:
+    """Whole-run counterpart of Simulation for one teller with FIFO order.
+
+    Draws every inter-arrival gap (1..max_arrival) and service time (1..max_service)
+    up front as NumPy arrays. There is no step-by-step event log; call run() and
+    then get_summary() exactly as with a finished Simulation.
+    """
+
+    def __init__(self, duration, max_arrival, max_service, seed=None):
+        self.duration = duration
+        self.max_arrival = max_arrival
+        self.max_service = max_service
+        self.seed = seed if seed is not None else new_seed()
+        self.rng = np.random.default_rng(self.seed)
+        self.result = None
+
+    def _draw_arrival_times(self):
+        # Draw enough gaps to cover the horizon on average, then top up if a run of long gaps fell short
+        mean_gap = (1 + self.max_arrival) / 2
+        block = int(self.duration / mean_gap * 1.1) + 16
+        chunks, last_time = [np.zeros(0, dtype=np.int64)], 0
+        while last_time < self.duration:
+            times = last_time + np.cumsum(self.rng.integers(1, self.max_arrival + 1, size=block))
+            chunks.append(times)
+            last_time = int(times[-1])
+        arrival_times = np.concatenate(chunks)
+        return arrival_times[arrival_times < self.duration]
+
+    def run(self):
+        arrival_times = self._draw_arrival_times()
+        service_times = self.rng.integers(1, self.max_service + 1, size=arrival_times.size)
+        self.result = simulate_fifo(arrival_times, service_times, self.duration)
+        return self
+
+    def get_summary(self, stress_threshold):
+        if self.result is None:
+            self.run()
+        waits = self.result['wait_times'][self.result['served']]
+        utilization = (self.result['total_busy_time'] / self.duration) * 100 if self.duration > 0 else 0
+        quantiles = np.quantile(waits, SUMMARY_QUANTILES) if waits.size else np.zeros(len(SUMMARY_QUANTILES))
+        summary = build_summary(int(waits.size), int(waits.sum()), int(waits.max(initial=0)),
+                                int((waits > stress_threshold).sum()), [utilization], stress_threshold,
+                                {quantile_key(p): float(q) for p, q in zip(SUMMARY_QUANTILES, quantiles)})
+        summary['seed'] = self.seed
+        return summary
@@ -0,0 +1,215 @@
+# benchmark.py
+#
+# Performance benchmarks for the engine and the chart, with regression tracking:
+#   - Simulation.step throughput (events/sec) per engine mode and load regime
+#   - get_summary cost as the number of customers served grows
+#   - memory per customer (traced allocations and CustomerStore bytes)
+#   - SimulationPlot.update_plot cost on a headless Agg canvas
+#
+# Results are written as JSON. Given a baseline file from an earlier run, every
+# metric is compared against it and the run fails when one is worse by more
+# than the threshold:
+#
+#   python benchmark.py --output baseline.json
+#   python benchmark.py --baseline baseline.json --threshold 0.1
+
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from simulation import ENGINE_VERSION, Simulation, SimulationMode, SimulationState
+
+# (name, max_arrival, max_service). A teller takes (max_service + 1) / 2 minutes
+# per customer on average plus the minute before it can start the next one, and
+# arrivals come every (max_arrival + 1) / 2 minutes, so the occupancy is about
+# (max_service + 3) / (max_arrival + 1).
+LOAD_REGIMES = (
+    ('light', 8, 3),       # ~0.67, the queue is usually short
+    ('moderate', 8, 5),    # ~0.89
+    ('overloaded', 3, 8),  # ~2.75, the queue grows without bound
+)
+SUMMARY_SIZES = (1_000, 10_000, 100_000)
+SUMMARY_CALLS = 200  # get_summary is microseconds; time it in loops
+DEFAULT_THRESHOLD = 0.10
+
+
+def _timed(function, repeat):
+    """Best wall time of `repeat` calls; the minimum is the least noisy estimate."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _metric(value, unit, higher_is_better):
+    return {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+
+def bench_step_throughput(duration, repeat):
+    results = {}
+    for mode in SimulationMode:
+        for name, max_arrival, max_service in LOAD_REGIMES:
+            for build_messages in (True, False):
+                events = 0
+
+                def run():
+                    nonlocal events
+                    simulation = Simulation(duration, max_arrival, max_service, mode=mode, seed=1,
+                                            build_messages=build_messages)
+                    events = 0
+                    while simulation.state == SimulationState.RUNNING:
+                        events += len(simulation.step())
+
+                elapsed = _timed(run, repeat)
+                key = f"step.{mode.name.lower()}.{name}" + ("" if build_messages else ".no_messages")
+                results[key] = _metric(events / elapsed, "events/s", True)
+    return results
+
+
+def _run_until_served(customers, max_arrival=8, max_service=3):
+    # Light load by default keeps customers flowing, so the served count grows with the duration
+    simulation = Simulation(customers * 8, max_arrival, max_service, mode=SimulationMode.EVENT, seed=1,
+                            build_messages=False)
+    while simulation.state == SimulationState.RUNNING and simulation.stats.count < customers:
+        simulation.step()
+    return simulation
+
+
+def bench_summary(sizes, repeat):
+    results = {}
+    for size in sizes:
+        simulation = _run_until_served(size)
+        # Alternate thresholds so the stressed count is recomputed as well as cached
+        def run():
+            for threshold in range(SUMMARY_CALLS):
+                simulation.get_summary(10 + threshold % 2)
+
+        elapsed = _timed(run, repeat)
+        results[f"summary.{size}"] = _metric(elapsed / SUMMARY_CALLS * 1e6, "us", False)
+    return results
+
+
+def bench_memory(customers):
+    results = {}
+    # Overloaded, most customers are still waiting at the end, so the queue's share shows up
+    for name, max_arrival, max_service in (LOAD_REGIMES[0], LOAD_REGIMES[-1]):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        simulation = _run_until_served(customers, max_arrival, max_service)
+        traced = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        arrived = len(simulation.all_customers)
+        prefix = "memory." if name == 'light' else f"memory.{name}."
+        results[prefix + "traced_per_customer"] = _metric(traced / arrived, "bytes", False)
+        results[prefix + "store_per_customer"] = _metric(simulation.all_customers.nbytes() / arrived, "bytes", False)
+    return results
+
+
+def bench_plot(customers, batch, repeat):
+    from plotting import SimulationPlot
+    import matplotlib.pyplot as plt
+
+    simulation = _run_until_served(customers)
+    finished = list(simulation.all_customers)[:customers]
+    batches = [finished[i:i + batch] for i in range(0, len(finished), batch)]
+    single = []
+
+    def run():
+        plot = SimulationPlot(None)
+        for chunk in batches:
+            plot.add_customers(chunk, 10)
+        # Per-customer updates at the steady rolling-window size, as the GUI does at low speed
+        for customer in finished[-50:]:
+            start = time.perf_counter()
+            plot.update_plot(customer, 10)
+            single.append(time.perf_counter() - start)
+        plt.close(plot.fig)
+
+    elapsed = _timed(run, repeat)
+    return {
+        'plot.frame': _metric(elapsed / len(batches) * 1e3, "ms", False),
+        'plot.update_plot': _metric(statistics.median(single) * 1e3, "ms", False),
+    }
+
+
+def run_benchmarks(quick=False):
+    """Runs every benchmark and returns the result document (see module comment)."""
+    repeat = 3 if quick else 5
+    results = {}
+    results.update(bench_step_throughput(20_000 if quick else 200_000, repeat))
+    results.update(bench_summary(SUMMARY_SIZES[:2] if quick else SUMMARY_SIZES, repeat))
+    results.update(bench_memory(10_000 if quick else 100_000))
+    results.update(bench_plot(1_000 if quick else 5_000, 20, repeat))
+    return {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'engine_version': ENGINE_VERSION,
+            'python': platform.python_version(),
+            'machine': platform.platform(),
+            'quick': quick,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """Per-metric change against a baseline document; `regressed` marks changes worse than threshold."""
+    report = {}
+    for key, metric in current['results'].items():
+        base = baseline['results'].get(key)
+        if base is None or not base['value']:
+            continue
+        change = (metric['value'] - base['value']) / base['value']
+        worse = -change if metric['higher_is_better'] else change
+        report[key] = {'baseline': base['value'], 'current': metric['value'], 'unit': metric['unit'],
+                       'change': change, 'regressed': worse > threshold}
+    return report
+
+
+def _print_report(results, report):
+    for key, metric in results['results'].items():
+        line = f"{key:40} {metric['value']:14.2f} {metric['unit']}"
+        if key in report:
+            flag = "  REGRESSION" if report[key]['regressed'] else ""
+            line += f"  ({report[key]['change']:+.1%} vs baseline){flag}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the simulation engine and chart.")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results saved by an earlier --output")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fractional slowdown counted as a regression (default: 0.10)")
+    parser.add_argument("--quick", action="store_true", help="smaller workloads for a fast smoke run")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.quick)
+    report = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('quick') != args.quick:
+            parser.error("the baseline was recorded with a different --quick setting")
+        report = compare(results, baseline, args.threshold)
+    _print_report(results, report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    regressions = [key for key, entry in report.items() if entry['regressed']]
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+# cli.py
+#
+# Headless command-line runner. Runs a simulation from flags and writes the
+# summary (and optionally per-customer records) as JSON Lines or CSV. Nothing
+# here imports tkinter or matplotlib, so it works on servers without a display.
+
+import argparse
+import csv
+import json
+import math
+import sys
+from contextlib import contextmanager
+
+from queues import QueueDiscipline
+from simulation import Simulation, SimulationMode, SimulationState, new_seed
+
+DISCIPLINES = {
+    'fifo': QueueDiscipline.FIFO,
+    'ssf': QueueDiscipline.SHORTEST_SERVICE,
+    'priority': QueueDiscipline.PRIORITY,
+}
+
+CUSTOMER_FIELDS = ('id', 'arrival_time', 'service_time', 'priority', 'start_time', 'wait_time')
+TIMELINE_FIELDS = ('start', 'end', 'queue_length', 'in_system', 'busy_fraction', 'queue_peak')
+# Run settings and their defaults. The flags parse to None so --resume can tell
+# which were given: a resumed run otherwise keeps its checkpoint's settings.
+RUN_DEFAULTS = {'duration': 120, 'max_arrival': 4, 'max_service': 8, 'tellers': 1, 'discipline': 'fifo',
+                'priority_classes': 1, 'mode': 'event'}
+# The ones --resume may change (see snapshot.OVERRIDABLE); the rest are fixed by the checkpoint
+RESUME_SETTINGS = ('duration', 'max_arrival', 'max_service', 'discipline')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run the bank queue simulation without the GUI.")
+    parser.add_argument("--duration", type=int, help="simulated minutes (default: 120)")
+    parser.add_argument("--max-arrival", type=int, help="maximum minutes between arrivals (default: 4)")
+    parser.add_argument("--max-service", type=int, help="maximum service minutes (default: 8)")
+    parser.add_argument("--stress-threshold", type=int, default=10, help="wait counted as long, in minutes (default: 10)")
+    parser.add_argument("--tellers", type=int, help="number of tellers (default: 1)")
+    parser.add_argument("--discipline", choices=DISCIPLINES, help="queue discipline (default: fifo)")
+    parser.add_argument("--priority-classes", type=int,
+                        help="customer classes for the priority discipline (default: 1)")
+    parser.add_argument("--arrivals", metavar="SPEC",
+                        help="arrival process instead of 1..max-arrival gaps: exp:MEAN, lognormal:MEAN:SIGMA, "
+                             "uniform:LOW:HIGH or schedule:START=RATE,...[@PERIOD]")
+    parser.add_argument("--services", metavar="SPEC",
+                        help="service process instead of 1..max-service: exp:MEAN, lognormal:MEAN:SIGMA or uniform:LOW:HIGH")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="replay arrivals and service times from a CSV/text or .npy trace (single runs only); "
+                             "a trace without a service column uses --services or the default draws")
+    parser.add_argument("--mode", choices=('event', 'tick'), help="engine clock (default: event)")
+    parser.add_argument("--seed", type=int, help="random seed for a reproducible run")
+    parser.add_argument("--checkpoint", metavar="FILE",
+                        help="save a resumable snapshot of the run to FILE (single runs only)")
+    parser.add_argument("--checkpoint-every", type=int, metavar="MINUTES",
+                        help="also refresh the checkpoint every MINUTES simulated minutes")
+    parser.add_argument("--resume", metavar="FILE",
+                        help="continue the run saved in a checkpoint, with its own settings and random streams; "
+                             "--duration (e.g. to extend a finished run), --max-arrival, --max-service, "
+                             "--discipline, --arrivals, --services and --seed replace them from there on")
+    parser.add_argument("--timeline", metavar="FILE",
+                        help="also write time-weighted queue length, customers in system and busy fraction "
+                             "per time bucket to FILE ('-' for stdout); single runs only")
+    parser.add_argument("--timeline-buckets", type=int, default=512, metavar="N",
+                        help="most buckets kept for --timeline; they widen as the run grows (default: 512)")
+    parser.add_argument("--instrument", metavar="FILE",
+                        help="write event counts, queue time series and call timings as JSON to FILE")
+    parser.add_argument("--instrument-resolution", type=int, default=1, metavar="MINUTES",
+                        help="simulated minutes between time-series samples (default: 1)")
+    parser.add_argument("--profile", metavar="FILE", help="write a cProfile/pstats dump of the run to FILE")
+    parser.add_argument("--steady-state", action="store_true",
+                        help="drop the warm-up (MSER-5) from the wait figures and add a batch-means "
+                             "confidence interval on the average wait")
+    parser.add_argument("--target-half-width", type=float, metavar="MINUTES",
+                        help="stop once the steady-state average wait is known to +/- MINUTES "
+                             "(95%% batch means); --duration becomes the upper limit")
+    parser.add_argument("--target-precision", type=float, metavar="FRACTION",
+                        help="like --target-half-width, relative to the average wait (e.g. 0.05)")
+    parser.add_argument("--replications", type=int, default=1, help="independent runs to aggregate (default: 1)")
+    parser.add_argument("--workers", type=int, help="worker processes for replications (default: all cores)")
+    parser.add_argument("--batch", action="store_true", help="use the vectorized single-teller FIFO engine")
+    parser.add_argument("--preview", action="store_true",
+                        help="print the analytic steady-state estimate and exit without simulating")
+    parser.add_argument("--compare", action="store_true",
+                        help="add the analytic estimate and its error against the simulated summary")
+    parser.add_argument("--format", choices=('json', 'csv'), default='json', help="output format (default: json)")
+    parser.add_argument("--output", default='-', help="summary destination file, '-' for stdout (default)")
+    parser.add_argument("--customers", metavar="FILE",
+                        help="also write per-customer records to FILE ('-' for stdout); single runs only")
+    return parser
+
+
+@contextmanager
+def _open_output(path):
+    if path == '-':
+        yield sys.stdout
+    else:
+        with open(path, "w", newline="") as f:
+            yield f
+
+
+def _scalar_summary(summary):
+    """Drops the GUI-only text fields and flattens per-teller utilization."""
+    row = {key: value for key, value in summary.items()
+           if key not in ('messages', 'insight', 'teller_utilization')}
+    for teller, busy in enumerate(summary.get('teller_utilization', []), start=1):
+        row[f'teller_{teller}_utilization'] = busy
+    return row
+
+
+def _json_safe(value):
+    """Infinite or NaN figures (e.g. an unstable queue's wait) become null so the output stays strict JSON."""
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def write_records(records, fieldnames, file, fmt):
+    """Writes dict records as JSON Lines or as CSV with a header row."""
+    if fmt == 'json':
+        for record in records:
+            file.write(json.dumps(_json_safe(record)) + "\n")
+    else:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def run_single(args, trace=None, resume_settings=None):
+    seed = args.seed if args.seed is not None else new_seed()
+    instrument = None
+    precision = None
+    if args.batch:
+        from batch import BatchSimulation
+        simulation = BatchSimulation(args.duration, args.max_arrival, args.max_service, seed=seed).run()
+        result = simulation.result
+        customers = ({'id': index + 1, 'arrival_time': int(result['arrival_times'][index]),
+                      'service_time': int(result['service_times'][index]), 'priority': 1,
+                      'start_time': int(result['start_times'][index]) if result['served'][index] else None,
+                      'wait_time': int(result['wait_times'][index]) if result['served'][index] else None}
+                     for index in range(result['arrival_times'].size))
+    else:
+        arrivals = services = None
+        if args.arrivals or args.services:
+            from processes import parse_process, process_rngs
+            arrival_rng, service_rng = process_rngs(seed)
+            arrivals = parse_process(args.arrivals, 'arrivals', arrival_rng) if args.arrivals else None
+            services = parse_process(args.services, 'services', service_rng) if args.services else None
+        if trace is not None:
+            arrivals = trace.arrivals
+            services = trace.services or services
+        if args.instrument or args.profile:
+            from instrumentation import Instrumentation
+            instrument = Instrumentation(resolution=args.instrument_resolution)
+        if args.resume:
+            import snapshot
+            overrides = dict(resume_settings or {})
+            if args.arrivals:
+                overrides['arrivals'] = arrivals
+            if args.services:
+                overrides['services'] = services
+            simulation = snapshot.load(args.resume, **overrides)
+            if instrument is not None:
+                instrument.attach(simulation)
+        else:
+            simulation = Simulation(args.duration, args.max_arrival, args.max_service,
+                                    mode=SimulationMode.EVENT if args.mode == 'event' else SimulationMode.TICK,
+                                    tellers=args.tellers, discipline=DISCIPLINES[args.discipline],
+                                    priority_classes=args.priority_classes, seed=seed, build_messages=False,
+                                    arrivals=arrivals, services=services, instrument=instrument,
+                                    timeline_buckets=args.timeline_buckets if args.timeline else None)
+        if args.profile:
+            with instrument.profiling():
+                precision = _run_simulation(simulation, args)
+            instrument.dump_profile(args.profile)
+        else:
+            precision = _run_simulation(simulation, args)
+        customers = ({field: getattr(c, field) for field in CUSTOMER_FIELDS} for c in simulation.all_customers)
+
+    if args.steady_state or precision is not None:
+        from steady_state import steady_state_summary
+        summary = _scalar_summary(steady_state_summary(simulation, args.stress_threshold))
+        if precision is not None:
+            summary.update(converged=precision['converged'], simulated_minutes=precision['time'])
+    else:
+        summary = _scalar_summary(simulation.get_summary(args.stress_threshold))
+    if args.compare:
+        summary.update(_analytic_fields(args, summary))
+    with _open_output(args.output) as file:
+        write_records([summary], list(summary), file, args.format)
+    if args.customers:
+        with _open_output(args.customers) as file:
+            write_records(customers, CUSTOMER_FIELDS, file, args.format)
+    if args.timeline:
+        series = simulation.get_timeline() or dict.fromkeys(TIMELINE_FIELDS, [])
+        rows = (dict(zip(TIMELINE_FIELDS, values)) for values in zip(*(series[field] for field in TIMELINE_FIELDS)))
+        with _open_output(args.timeline) as file:
+            write_records(rows, TIMELINE_FIELDS, file, args.format)
+    if args.instrument:
+        with _open_output(args.instrument) as file:
+            json.dump(instrument.report(), file)
+
+
+def _run_simulation(simulation, args):
+    """Runs to the end, or until a steady-state precision target is met; returns that estimate if any."""
+    if args.target_half_width is not None or args.target_precision is not None:
+        from steady_state import run_until_precise
+        return run_until_precise(simulation, args.target_half_width, args.target_precision)
+    _run_with_checkpoints(simulation, args.checkpoint, args.checkpoint_every)
+    return None
+
+
+def _run_with_checkpoints(simulation, path, every):
+    """Runs to completion, saving a snapshot every `every` simulated minutes and at the end."""
+    if not path:
+        simulation.run()
+        return
+    import snapshot
+    next_save = simulation.time + every if every else None
+    while simulation.state == SimulationState.RUNNING:
+        simulation.step()
+        if next_save is not None and simulation.time >= next_save:
+            snapshot.save(simulation, path)
+            next_save = simulation.time + every
+    snapshot.save(simulation, path)
+
+
+def _analytic_fields(args, summary):
+    from analytic import compare, estimate
+    report = compare(estimate(args.max_arrival, args.max_service, args.tellers), summary)
+    return {
+        'analytic_avg_wait': report['avg_wait']['analytic'],
+        'analytic_utilization': report['utilization']['analytic'],
+        'avg_wait_relative_error': report['avg_wait']['relative_error'],
+        'utilization_relative_error': report['utilization']['relative_error'],
+    }
+
+
+def run_preview(args):
+    from analytic import estimate, preview_text
+    analytic = estimate(args.max_arrival, args.max_service, args.tellers)
+    analytic['text'] = preview_text(analytic)
+    with _open_output(args.output) as file:
+        write_records([analytic], list(analytic), file, args.format)
+
+
+def run_replicated(args):
+    from replication import run_replications
+    result = run_replications(args.duration, args.max_arrival, args.max_service, args.replications,
+                              stress_threshold=args.stress_threshold, seed=args.seed, workers=args.workers,
+                              use_batch=args.batch, tellers=args.tellers,
+                              discipline=DISCIPLINES[args.discipline], priority_classes=args.priority_classes,
+                              arrival_spec=args.arrivals, service_spec=args.services)
+    rows = [{'metric': name, **interval} for name, interval in result['metrics'].items()]
+    with _open_output(args.output) as file:
+        if args.format == 'json':
+            write_records([{'seed': result['seed'], 'replications': result['replications'],
+                            'confidence': result['confidence'], 'metrics': result['metrics']}], None, file, 'json')
+        else:
+            write_records(rows, list(rows[0]), file, 'csv')
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    resume_settings = None
+    if args.resume:
+        fixed = [name for name in RUN_DEFAULTS if name not in RESUME_SETTINGS and getattr(args, name) is not None]
+        if fixed:
+            parser.error("--resume keeps the checkpoint's "
+                         + ", ".join("--" + name.replace('_', '-') for name in fixed))
+        if args.trace or args.preview or args.compare:
+            parser.error("--resume cannot be combined with --trace, --preview or --compare")
+        resume_settings = {name: getattr(args, name) for name in RESUME_SETTINGS if getattr(args, name) is not None}
+        if 'discipline' in resume_settings:
+            resume_settings['discipline'] = DISCIPLINES[resume_settings['discipline']]
+        if args.seed is not None:
+            resume_settings['seed'] = args.seed
+    for name, default in RUN_DEFAULTS.items():
+        if getattr(args, name) is None:
+            setattr(args, name, default)
+    if args.batch and (args.tellers != 1 or args.discipline != 'fifo'):
+        parser.error("--batch only supports one teller with the fifo discipline")
+    if args.batch and (args.arrivals or args.services or args.trace):
+        parser.error("--batch only supports the default uniform arrival and service draws")
+    if (args.checkpoint or args.resume) and (args.batch or args.replications > 1):
+        parser.error("--checkpoint and --resume only apply to single simulation runs")
+    if args.checkpoint and args.trace:
+        parser.error("--checkpoint cannot snapshot a --trace replay")
+    if (args.instrument or args.profile or args.timeline) and (args.batch or args.replications > 1):
+        parser.error("--instrument, --profile and --timeline only apply to single simulation runs")
+    targets = args.target_half_width is not None or args.target_precision is not None
+    if (args.steady_state or targets) and (args.batch or args.replications > 1):
+        parser.error("--steady-state and precision targets apply to single simulation runs")
+    if targets and args.checkpoint:
+        parser.error("--checkpoint cannot be combined with a precision target")
+    if args.checkpoint_every and not args.checkpoint:
+        parser.error("--checkpoint-every needs --checkpoint")
+    if args.trace and (args.arrivals or args.replications > 1):
+        parser.error("--trace cannot be combined with --arrivals or --replications")
+    if (args.preview or args.compare) and (args.arrivals or args.services or args.trace):
+        parser.error("--preview and --compare model the default uniform arrival and service draws")
+    trace = None
+    if args.trace:
+        from processes import TraceReplay
+        try:
+            trace = TraceReplay(args.trace)
+        except (OSError, ValueError) as error:
+            parser.error(f"cannot read --trace {args.trace}: {error}")
+        if args.services and trace.services is not None:
+            parser.error("--services cannot replace the service times recorded in --trace")
+    if args.preview:
+        run_preview(args)
+    elif args.replications > 1:
+        if args.customers:
+            parser.error("--customers is only available for single runs")
+        run_replicated(args)
+    else:
+        run_single(args, trace, resume_settings)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
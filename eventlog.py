@@ -0,0 +1,110 @@
+# eventlog.py
+#
+# Bounded, batched simulation log for the GUI. Raw event dicts are handed to a
+# background thread that formats them (and optionally appends them to a spill
+# file); the Tk thread picks up the finished lines once per frame, inserts them
+# with one call and trims the Text widget to the last `max_lines` lines.
+
+import queue
+import threading
+import time
+from collections import deque
+
+from simulation import format_event
+
+DEFAULT_MAX_LINES = 2000
+
+
+class EventLog:
+    """Ring-buffer-backed view of the simulation log in a Tk Text widget.
+
+    Only the Tk thread may call flush() and clear(); add() is cheap and can be
+    called as often as needed.
+    """
+
+    def __init__(self, text, max_lines=DEFAULT_MAX_LINES, spill_path=None):
+        self.text = text
+        self.max_lines = max_lines
+        self.multi_teller = False  # add teller labels when formatting events
+        self._lines_in_widget = 0
+        self._generation = 0  # bumped by clear() so in-flight batches are dropped
+        self._incoming = queue.Queue()
+        self._formatted = deque(maxlen=max_lines)  # older lines would be trimmed anyway
+        self._lock = threading.Lock()
+        self._spill = open(spill_path, "a", encoding="utf-8") if spill_path else None
+        threading.Thread(target=self._format_loop, name="event-log", daemon=True).start()
+
+    def add(self, entries):
+        """Queues (event dict or plain message, tag) entries for formatting."""
+        if entries:
+            self._incoming.put((self._generation, time.time(), entries))
+
+    def _format_loop(self):
+        # Errors are reported in the log instead of ending the thread: once it is
+        # gone, flush(wait=True) would wait forever and freeze the Tk thread
+        while True:
+            generation, stamp, entries = self._incoming.get()
+            try:
+                self._format(generation, stamp, entries)
+            except Exception as error:
+                self._append(generation, [(self._timestamp(time.time()), f"Log formatting failed: {error!r}", "")])
+            finally:
+                self._incoming.task_done()
+
+    def _format(self, generation, stamp, entries):
+        timestamp = self._timestamp(stamp)
+        lines = [(timestamp,
+                  entry if isinstance(entry, str) else format_event(entry, self.multi_teller),
+                  tag or "")
+                 for entry, tag in entries]
+        if self._spill:
+            try:
+                self._spill.writelines(f"{stamp_text}{message}\n" for stamp_text, message, _ in lines)
+                self._spill.flush()
+            except OSError as error:
+                spill, self._spill = self._spill, None  # e.g. disk full: keep logging on screen only
+                try:
+                    spill.close()
+                except OSError:
+                    pass
+                lines.append((timestamp, f"Stopped writing the log file: {error}", "summary"))
+        self._append(generation, lines)
+
+    def _append(self, generation, lines):
+        with self._lock:
+            if generation == self._generation:
+                self._formatted.extend(lines)
+
+    @staticmethod
+    def _timestamp(stamp):
+        return f"[{time.strftime('%H:%M:%S', time.localtime(stamp))}] "
+
+    def flush(self, wait=False):
+        """Inserts every formatted line into the widget; `wait` first lets the formatter catch up."""
+        if wait:
+            self._incoming.join()
+        with self._lock:
+            lines = list(self._formatted)
+            self._formatted.clear()
+        if not lines:
+            return
+
+        chunks = []
+        for timestamp, message, tag in lines:
+            # An empty tag list, not None: tkinter truncates the Tcl call at the first None
+            chunks += [timestamp, "timestamp", message + '\n', tag]
+            self._lines_in_widget += message.count('\n') + 1
+        self.text.insert("end", *chunks)
+
+        excess = self._lines_in_widget - self.max_lines
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
+            self._lines_in_widget -= excess
+        self.text.see("end")
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._formatted.clear()
+        self.text.delete("1.0", "end")
+        self._lines_in_widget = 0
@@ -3,7 +3,12 @@
 import tkinter as tk
 from tkinter import ttk
 from simulation import Simulation, SimulationState
-from plotting import SimulationPlot
+from queues import QueueDiscipline
+from plotting import SimulationPlot, TimelinePlot
+from eventlog import EventLog
+from runner import SimulationProcess, SimulationRunner
+from analytic import estimate, preview_text
+from instrumentation import Instrumentation
 import datetime # For timestamps in the log
 
 BG_COLOR = "#e0e7ee"  
@@ -13,6 +18,27 @@ LOG_FG = "#eceff1"
 PRIMARY_ACCENT = "#4f46e5" 
 SECONDARY_ACCENT = "#6366f1" 
 FONT_FAMILY = "Inter" 
+PRIORITY_CLASSES = 3 # Number of customer classes used by the priority discipline
+
+DISCIPLINE_LABELS = {
+    "First Come, First Served": QueueDiscipline.FIFO,
+    "Shortest Service First": QueueDiscipline.SHORTEST_SERVICE,
+    "Priority Classes": QueueDiscipline.PRIORITY,
+}
+
+# Simulated minutes advanced per batch; None lets the engine thread run flat out
+SPEED_LABELS = {
+    "Normal (1 min/frame)": 1,
+    "Fast (10 mins/frame)": 10,
+    "Faster (100 mins/frame)": 100,
+    "Max Speed": None,
+}
+FRAME_MS = 33 # The GUI drains the engine thread's batches at most this often (~30 fps)
+LOG_MAX_LINES = 2000 # Older log lines are dropped from the widget
+LOG_SPILL_PATH = None # Set to a file path to keep the full log on disk
+TIMELINE_BUCKETS = 300 # Resolution of the queue-over-time chart, whatever the duration
+INSTRUMENT = False # Time steps, summaries and frames of each run and log the figures at the end
+PROFILE_PATH = None # With INSTRUMENT, also write a pstats dump of each run here
 
 class Application(tk.Frame):
     """Main application class for the simulation GUI."""
@@ -26,8 +52,11 @@ class Application(tk.Frame):
         self.pack(fill="both", expand=True, padx=15, pady=15) 
 
         self.simulation = None
+        self.runner = None # Steps self.simulation on a worker thread while it runs
+        self._frame_job = None # Pending after() id of the next update_simulation
         self.simulation_plot = None
         self.simulation_speed_ms = 50  
+        self.instrumentation = None
 
         self._create_widgets()
         self._layout_widgets()
@@ -40,7 +69,8 @@ class Application(tk.Frame):
         # --- Output Frame ---
         self.output_frame = tk.Frame(self, bg=BG_COLOR, padx=0, pady=0) 
         self.output_frame.rowconfigure(0, weight=3) 
-        self.output_frame.rowconfigure(1, weight=1) # Log/Summary row
+        self.output_frame.rowconfigure(1, weight=2) # Queue-over-time chart
+        self.output_frame.rowconfigure(2, weight=1) # Log/Summary row
         self.output_frame.columnconfigure(0, weight=3) # Chart/Log column
         self.output_frame.columnconfigure(1, weight=1) # Summary column
 
@@ -48,6 +78,7 @@ class Application(tk.Frame):
 
         
         self.simulation_plot = SimulationPlot(self.output_frame)
+        self.timeline_plot = TimelinePlot(self.output_frame)
 
         # --- Log Widget ---
         self._create_log_widgets()
@@ -66,15 +97,28 @@ class Application(tk.Frame):
         self.arrival_var = self._create_slider("Max Arrival Interval (mins)", 1, 10, 4, 2)
         self.service_var = self._create_slider("Max Service Time (mins)", 1, 20, 8, 3)
         self.stress_var = self._create_slider("High Wait Threshold (mins)", 1, 30, 10, 4)
+        self.tellers_var = self._create_slider("Number of Tellers", 1, 10, 1, 5)
+
+        self.discipline_var, self.discipline_box = self._create_combobox("Queue Discipline", DISCIPLINE_LABELS, 6)
+        self.speed_var, self.speed_box = self._create_combobox("Playback Speed", SPEED_LABELS, 7)
+        self.speed_var.trace_add("write", lambda *_: self._apply_speed())
+
+        # Instant steady-state estimate, refreshed whenever the model sliders move
+        self.preview_label = ttk.Label(self.controls_frame, text="", wraplength=320, background=CONTROLS_BG,
+                                       font=(FONT_FAMILY, 10, "italic"), foreground="#616161", justify="left")
+        for var in (self.arrival_var, self.service_var, self.tellers_var):
+            var.trace_add("write", lambda *_: self.update_preview())
+        self.update_preview()
 
         # Buttons with improved styling
         self.run_button = ttk.Button(self.controls_frame, text="Run Simulation", command=self.run_simulation, style="Accent.TButton")
+        self.pause_button = ttk.Button(self.controls_frame, text="Pause", command=self.toggle_pause, state="disabled", style="TButton")
         self.reset_button = ttk.Button(self.controls_frame, text="Reset", command=self.reset_simulation, state="disabled", style="TButton")
 
     def _create_log_widgets(self):
         """Create the widgets for the simulation log."""
         log_frame = tk.Frame(self.output_frame, bg=BG_COLOR, relief="flat")
-        log_frame.grid(row=1, column=0, sticky="nsew", padx=(0, 15), pady=(15, 0))
+        log_frame.grid(row=2, column=0, sticky="nsew", padx=(0, 15), pady=(15, 0))
         
         ttk.Label(log_frame, text="Simulation Log", font=(FONT_FAMILY, 16, "bold"), 
                   background=BG_COLOR, foreground=PRIMARY_ACCENT).pack(anchor="w", pady=(0, 10))
@@ -95,13 +139,15 @@ class Application(tk.Frame):
         self.log_box.tag_configure("finish", foreground="#a7d9b5") # Light Green
         self.log_box.tag_configure("summary", foreground="#ffffff", font=(FONT_FAMILY, 10, "bold"))
         self.log_box.tag_configure("timestamp", foreground="#9e9e9e", font=(FONT_FAMILY, 9)) # Grey for timestamps
+
+        self.event_log = EventLog(self.log_box, max_lines=LOG_MAX_LINES, spill_path=LOG_SPILL_PATH)
         
         self.log(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] Adjust controls and click 'Run Simulation'.", "summary")
 
     def _create_summary_widgets(self):
         """Create the widgets for the summary panel."""
         summary_frame = tk.Frame(self.output_frame, bg=CONTROLS_BG, relief="flat", bd=0)
-        summary_frame.grid(row=1, column=1, sticky="nsew", padx=(15, 0), pady=(15, 0))
+        summary_frame.grid(row=2, column=1, sticky="nsew", padx=(15, 0), pady=(15, 0))
         summary_frame.grid_propagate(False) # Prevent frame from shrinking to content size
         
         ttk.Label(summary_frame, text="Live Summary", font=(FONT_FAMILY, 16, "bold"), 
@@ -117,7 +163,8 @@ class Application(tk.Frame):
             "Avg. Wait": self._create_metric(metrics_container, "Avg. Wait", "0.0", row=0),
             "Max Wait": self._create_metric(metrics_container, "Max Wait", "0", row=1),
             "Served": self._create_metric(metrics_container, "Served", "0", row=2),
-            "Utilization": self._create_metric(metrics_container, "Utilization", "0%", row=3)
+            "Utilization": self._create_metric(metrics_container, "Utilization", "0%", row=3),
+            "P95 Wait": self._create_metric(metrics_container, "P95 Wait", "0.0", row=4)
         }
 
         self.insight_label = ttk.Label(summary_frame, text="Run simulation for insights.", 
@@ -136,85 +183,178 @@ class Application(tk.Frame):
         
         # Plotting widget takes full width at the top of the output frame
         self.simulation_plot.get_tk_widget().grid(row=0, column=0, columnspan=2, sticky="nsew", pady=(0, 15))
+        self.timeline_plot.get_tk_widget().grid(row=1, column=0, columnspan=2, sticky="nsew")
         
         
-        self.run_button.grid(row=5, column=0, columnspan=3, pady=(30, 10), sticky="ew", padx=10)
-        self.reset_button.grid(row=6, column=0, columnspan=3, sticky="ew", padx=10)
+        self.run_button.grid(row=8, column=0, columnspan=3, pady=(30, 10), sticky="ew", padx=10)
+        self.pause_button.grid(row=9, column=0, columnspan=3, sticky="ew", padx=10, pady=(0, 10))
+        self.reset_button.grid(row=10, column=0, columnspan=3, sticky="ew", padx=10)
+        self.preview_label.grid(row=11, column=0, columnspan=3, sticky="ew", padx=10, pady=(20, 0))
 
     def run_simulation(self):
         """Starts the simulation process."""
         self.reset_simulation() # Clear previous state
         self.set_controls_state("disabled")
 
+        discipline = DISCIPLINE_LABELS[self.discipline_var.get()]
         self.simulation = Simulation(
             duration=self.duration_var.get(),
             max_arrival=self.arrival_var.get(),
-            max_service=self.service_var.get()
+            max_service=self.service_var.get(),
+            tellers=self.tellers_var.get(),
+            discipline=discipline,
+            priority_classes=PRIORITY_CLASSES if discipline == QueueDiscipline.PRIORITY else 1,
+            build_messages=False, # The event log formats lines off the Tk thread
+            instrument=self._start_instrumentation(),
+            timeline_buckets=TIMELINE_BUCKETS
         )
-        self.log_box.delete("1.0", tk.END)
+        self.event_log.clear()
+        self.event_log.multi_teller = self.simulation.tellers > 1
         self.log(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] === Simulation Begins ===", "summary")
-        self.log(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] Duration: {self.simulation.duration} mins | Arrival: 1-{self.simulation.max_arrival} mins | Service: 1-{self.simulation.max_service} mins")
-        
-        self.update_simulation() # Start the loop
-
-    def update_simulation(self):
-        """The main simulation loop, called repeatedly."""
-        if self.simulation is None or self.simulation.state != SimulationState.RUNNING:
-            return
-
-        events = self.simulation.step()
-        for event in events:
-            self.log(event['message'], event['type'])
-            if event['type'] == 'finish':
-                self.simulation_plot.update_plot(event['customer'], self.stress_var.get())
+        self.log(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] Duration: {self.simulation.duration} mins | Arrival: 1-{self.simulation.max_arrival} mins | Service: 1-{self.simulation.max_service} mins | Tellers: {self.simulation.tellers} | {self.discipline_var.get()} | Seed: {self.simulation.seed}")
         
-        self.update_summary_metrics()
-
-        if self.simulation.state == SimulationState.FINISHED:
-            self.finish_simulation()
-        else:
-            self.master.after(self.simulation_speed_ms, self.update_simulation)
+        # Controls stay locked, but a running simulation can be paused or reset (stopped)
+        self.pause_button.config(state="normal", text="Pause")
+        self.reset_button.config(state="normal")
 
-    def finish_simulation(self):
+        interval = self.simulation_speed_ms / 1000
+        if self.instrumentation is None:
+            self.runner = SimulationProcess(self.simulation, self.stress_var.get(), interval=interval)
+        else: # The hooks and profiler live in this process, so instrumented runs step on a thread
+            self.runner = SimulationRunner(self.simulation, self.stress_var.get(), interval=interval,
+                                           profile=bool(PROFILE_PATH))
+        self._apply_speed()
+        self.runner.start()
+        self.update_simulation() # Start the drawing loop
+
+    def _apply_speed(self):
+        if self.runner is not None:
+            self.runner.steps_per_batch = SPEED_LABELS[self.speed_var.get()]
+
+    def update_simulation(self, runner=None):
+        """The drawing loop, called once per frame.
+
+        Drains the batches the engine thread has published since the last frame
+        and applies their log lines, finished customers and latest summary in
+        one go. The engine never runs on this thread, so slow steps or
+        summaries cannot freeze the window.
+        """
+        runner = runner or self.runner
+        self._frame_job = None
+        if runner is None or runner is not self.runner:
+            return # A callback scheduled before a reset; that run is gone
+
+        log_entries = []
+        finished_customers = []
+        summary = None
+        timeline = None
+        final = None
+        for batch in runner.drain():
+            log_entries += [(event, event['type']) for event in batch['events']]
+            finished_customers += batch['finished']
+            summary = batch['summary'] or summary
+            timeline = batch['timeline'] or timeline
+            if batch['final']:
+                final = batch
+
+        self.event_log.add(log_entries)
+        self.event_log.flush()
+        if finished_customers:
+            self.simulation_plot.add_customers(finished_customers, self.stress_var.get())
+        if summary is not None:
+            self.update_summary_metrics(summary)
+        if timeline is not None:
+            self.timeline_plot.update_series(timeline)
+
+        if final is not None and final['state'] == SimulationState.FINISHED:
+            self.finish_simulation(final['summary'])
+        elif final is None:
+            self._frame_job = self.master.after(FRAME_MS, self.update_simulation, runner)
+
+    def finish_simulation(self, summary):
         """Finalizes the simulation and displays summary insights."""
+        self.runner = None
         self.log(f"\n[{datetime.datetime.now().strftime('%H:%M:%S')}] === Simulation Summary ===", "summary")
-        summary = self.simulation.get_summary(self.stress_var.get())
         
         for msg in summary['messages']:
             self.log(msg)
+        self._finish_instrumentation()
             
         self.insight_label.config(text=summary['insight']['text'], foreground=summary['insight']['color'], font=(FONT_FAMILY, 12, "bold"))
         self.set_controls_state("normal")
+        self.pause_button.config(state="disabled", text="Pause")
         self.reset_button.config(state="normal")
+
+    def toggle_pause(self):
+        """Pauses or resumes the engine thread; the drawing loop keeps draining what it produced."""
+        if self.runner is None:
+            return
+        if self.runner.paused:
+            self.runner.resume()
+            self.pause_button.config(text="Pause")
+        else:
+            self.runner.pause()
+            self.pause_button.config(text="Resume")
     
+    def _start_instrumentation(self):
+        """Fresh instrumentation for a run when INSTRUMENT is on, timing each frame as well."""
+        self.instrumentation = Instrumentation() if INSTRUMENT else None
+        if self.instrumentation is None:
+            return None
+        self.update_simulation = self.instrumentation.timed('update_simulation', Application.update_simulation.__get__(self))
+        return self.instrumentation
+
+    def _finish_instrumentation(self):
+        """Logs the run's event counts and call timings (and writes the profile)."""
+        if self.instrumentation is None:
+            return
+        if PROFILE_PATH:
+            self.instrumentation.dump_profile(PROFILE_PATH) # The engine thread has left profiling() by now
+        report = self.instrumentation.report()
+        self.log(f"Events: {report['event_counts']}")
+        for name, timing in report['timings'].items():
+            self.log(f"{name}: {timing['count']} calls, mean {timing['mean_ns'] / 1000:.1f} us, "
+                     f"p95 {timing['p95_ns'] / 1000:.1f} us, max {timing['max_ns'] / 1000:.1f} us")
+        self.instrumentation = None
+
     def reset_simulation(self):
         """Resets the UI and simulation state to the beginning."""
-        if self.simulation:
-            self.simulation.state = SimulationState.STOPPED
-            self.simulation = None
+        if self.runner is not None:
+            self.runner.stop()
+            self.runner = None
+        if self._frame_job is not None:
+            self.master.after_cancel(self._frame_job)
+            self._frame_job = None
+        self.simulation = None
+        self.instrumentation = None # Abandoned runs are not reported
             
         self.simulation_plot.clear()
-        self.log_box.delete("1.0", tk.END)
+        self.timeline_plot.clear()
+        self.event_log.clear()
         self.log(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] Adjust controls and click 'Run Simulation'.", "summary")
         
         for key, var in self.metrics.items():
-            var.set("0" if key != "Avg. Wait" else "0.0")
+            var.set("0.0" if key in ("Avg. Wait", "P95 Wait") else "0")
         self.metrics["Utilization"].set("0%")
         
         self.insight_label.config(text="Run simulation for insights.", foreground="#616161", font=(FONT_FAMILY, 11, "italic"))
         self.set_controls_state("normal")
         self.run_button.config(state="normal") 
+        self.pause_button.config(state="disabled", text="Pause")
         self.reset_button.config(state="disabled")
 
-    def update_summary_metrics(self):
-        """Updates the live summary panel during the simulation."""
-        if not self.simulation: return
+    def update_preview(self):
+        """Shows the analytic estimate for the current slider settings."""
+        analytic = estimate(self.arrival_var.get(), self.service_var.get(), self.tellers_var.get())
+        self.preview_label.config(text="Analytic preview: " + preview_text(analytic))
 
-        summary = self.simulation.get_summary(self.stress_var.get())
+    def update_summary_metrics(self, summary):
+        """Updates the live summary panel from a summary published by the engine thread."""
         self.metrics["Avg. Wait"].set(f"{summary['avg_wait']:.1f}")
         self.metrics["Max Wait"].set(f"{summary['max_wait']}")
         self.metrics["Served"].set(f"{summary['total_served']}")
         self.metrics["Utilization"].set(f"{summary['utilization']:.0f}%")
+        self.metrics["P95 Wait"].set(f"{summary['p95_wait']:.1f}")
 
     # --- Helper methods for creating widgets ---
     def _create_slider(self, text, from_, to, default, row):
@@ -236,6 +376,15 @@ class Application(tk.Frame):
         
         return var
 
+    def _create_combobox(self, text, options, row):
+        """Creates a labeled read-only drop-down over the keys of `options`."""
+        ttk.Label(self.controls_frame, text=text, background=CONTROLS_BG, 
+                  font=(FONT_FAMILY, 11, "bold")).grid(row=row, column=0, sticky="w", pady=(15,5))
+        var = tk.StringVar(value=next(iter(options)))
+        box = ttk.Combobox(self.controls_frame, textvariable=var, values=list(options), state="readonly", width=24)
+        box.grid(row=row, column=1, columnspan=2, sticky="ew", pady=(15,5))
+        return var, box
+
     def _create_metric(self, parent, label_text, default_value, row):
         """Creates a single metric display for the summary panel."""
         frame = tk.Frame(parent, bg=CONTROLS_BG)
@@ -255,7 +404,11 @@ class Application(tk.Frame):
         for child in self.controls_frame.winfo_children():
             if isinstance(child, ttk.Label) and child.cget("text") == "Simulation Controls":
                 continue
-            if isinstance(child, (ttk.Scale, ttk.Button)):
+            if child is self.speed_box: # Speed can be changed while the simulation runs
+                continue
+            if isinstance(child, ttk.Combobox):
+                child.config(state="disabled" if state == "disabled" else "readonly")
+            elif isinstance(child, (ttk.Scale, ttk.Button)):
                 child.config(state=state)
             elif isinstance(child, tk.Frame): # Handle slider frames
                 for sub_child in child.winfo_children():
@@ -265,10 +418,8 @@ class Application(tk.Frame):
 
     def log(self, message, tag=None):
         """Logs a message to the text box with an optional style tag and timestamp."""
-        timestamp = datetime.datetime.now().strftime('%H:%M:%S')
-        self.log_box.insert(tk.END, f"[{timestamp}] ", "timestamp")
-        self.log_box.insert(tk.END, message + '\n', tag)
-        self.log_box.see(tk.END)
+        self.event_log.add([(message, tag)])
+        self.event_log.flush(wait=True)
 
 
 def launch_gui():
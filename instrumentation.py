@@ -0,0 +1,152 @@
+# instrumentation.py
+#
+# Opt-in profiling for Simulation and the GUI loop. An Instrumentation object
+# passed as Simulation(instrument=...) replaces that instance's step and
+# get_summary with timed wrappers when the simulation is built; without one the
+# plain class methods run, so a disabled layer costs nothing in the hot loop.
+#
+# Collected per run:
+#   - events by type
+#   - queue length and busy tellers after the first step at or past every
+#     `resolution` simulated minutes
+#   - perf_counter_ns latency histograms per timed call (step, get_summary, ...)
+#   - optionally a cProfile profile, written out as a pstats dump
+
+import cProfile
+import functools
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+
+# Histogram buckets keep this many significant bits of each duration (<= 12.5% error)
+HISTOGRAM_BITS = 4
+REPORT_QUANTILES = (0.50, 0.95, 0.99)
+
+
+class LatencyHistogram:
+    """Log-linear histogram of nanosecond durations: O(1) record, bounded memory."""
+
+    def __init__(self):
+        self.counts = Counter()  # bucket lower bound (ns) -> observations
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns):
+        shift = max(0, ns.bit_length() - HISTOGRAM_BITS)
+        self.counts[ns >> shift << shift] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def quantile(self, p):
+        """Lower bound of the bucket holding the p-quantile."""
+        rank = p * self.count
+        seen = 0
+        for bound in sorted(self.counts):
+            seen += self.counts[bound]
+            if seen >= rank:
+                return bound
+        return 0
+
+    def summary(self):
+        summary = {'count': self.count, 'total_ns': self.total_ns,
+                   'mean_ns': self.total_ns / self.count if self.count else 0, 'max_ns': self.max_ns}
+        summary.update({f"p{round(p * 100)}_ns": self.quantile(p) for p in REPORT_QUANTILES})
+        return summary
+
+
+class Instrumentation:
+    """Event counts, state time series, call-latency histograms and an optional profiler."""
+
+    def __init__(self, resolution=1):
+        self.resolution = resolution  # simulated minutes between time-series samples
+        self.event_counts = Counter()
+        self.sample_times = array('q')
+        self.queue_lengths = array('q')
+        self.in_service = array('q')
+        self.timings = {}
+        self.profiler = None
+        self._next_sample = 0
+
+    def histogram(self, name):
+        if name not in self.timings:
+            self.timings[name] = LatencyHistogram()
+        return self.timings[name]
+
+    def timed(self, name, function):
+        """Wraps `function` so every call is recorded in the `name` histogram."""
+        histogram = self.histogram(name)
+        clock = time.perf_counter_ns
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.record(clock() - start)
+        return wrapper
+
+    def attach(self, simulation):
+        """Installs the hooks on one Simulation instance; called from Simulation.__init__."""
+        step = self.timed('step', simulation.step)
+        counts = self.event_counts
+
+        def instrumented_step():
+            events = step()
+            for event in events:
+                counts[event['type']] += 1
+            if simulation.time >= self._next_sample:
+                self._sample(simulation)
+            return events
+
+        self._next_sample = simulation.time
+        simulation.step = instrumented_step
+        simulation.get_summary = self.timed('get_summary', simulation.get_summary)
+
+    def _sample(self, simulation):
+        self.sample_times.append(simulation.time)
+        self.queue_lengths.append(len(simulation.queue))
+        self.in_service.append(sum(customer is not None for customer in simulation.in_service))
+        self._next_sample = (simulation.time // self.resolution + 1) * self.resolution
+
+    def start_profiling(self):
+        """Starts (or continues) collecting a cProfile profile of this thread."""
+        if self.profiler is None:
+            self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def stop_profiling(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    @contextmanager
+    def profiling(self):
+        """Runs the enclosed block under cProfile; repeated blocks accumulate."""
+        self.start_profiling()
+        try:
+            yield self.profiler
+        finally:
+            self.stop_profiling()
+
+    def dump_profile(self, path):
+        """Writes the collected profile as a pstats file (view with `python -m pstats PATH`)."""
+        if self.profiler is None:
+            raise ValueError("nothing was profiled; run the simulation inside profiling()")
+        self.profiler.dump_stats(path)
+
+    def report(self):
+        """Everything collected so far as plain, JSON-ready data."""
+        return {
+            'event_counts': dict(self.event_counts),
+            'series': {
+                'resolution': self.resolution,
+                'time': list(self.sample_times),
+                'queue_length': list(self.queue_lengths),
+                'in_service': list(self.in_service),
+            },
+            'timings': {name: histogram.summary() for name, histogram in self.timings.items()},
+        }
@@ -1,3 +1,11 @@
-from gui import launch_gui
+import sys
 
-launch_gui()
+if __name__ == "__main__":  # also keeps spawned worker processes from relaunching the app
+    if len(sys.argv) > 1:
+        # Any command-line flags mean a headless run; see `python main.py --help`
+        from cli import main
+        sys.exit(main())
+
+    from gui import launch_gui
+
+    launch_gui()
@@ -1,53 +1,203 @@
 # plotting.py
 
+from array import array
+
+import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
+
+STRESSED_COLOR = to_rgba('#c62828') # Red
+NORMAL_COLOR = to_rgba('#4f46e5') # Indigo
+DEFAULT_WINDOW = 500 # Customers shown before the chart becomes a rolling window
+AXIS_HEADROOM = 1.25 # Axis limits grow by this factor so full redraws stay rare
 
 class SimulationPlot:
-    
-    def __init__(self, master):
+    """Wait-time bar chart that reuses one artist and blits incremental frames.
+
+    Every bar is a segment of a single LineCollection whose data is replaced in
+    place. Frames that keep the axis limits only restore the cached background
+    and redraw that collection; the full figure is redrawn only when the axes
+    have to grow. Once more than `window` customers have finished, the chart
+    shows a rolling window of the most recent `window` customer IDs.
+
+    With master=None the chart renders off-screen on a plain Agg canvas, which
+    needs no Tk or display (used by the benchmarks).
+    """
+
+    def __init__(self, master, window=DEFAULT_WINDOW):
         plt.style.use('seaborn-v0_8-whitegrid')
         self.fig, self.ax = plt.subplots(figsize=(8, 4), dpi=100)
         self.fig.patch.set_facecolor('#ffffff') # Match control panel background
 
-        #Embed the Figure in a Tkinter Canvas 
-        self.canvas = FigureCanvasTkAgg(self.fig, master=master)
-        
-        self.customer_ids = []
-        self.wait_times = []
-        
+        if master is None:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            self.canvas = FigureCanvasAgg(self.fig)
+        else:
+            #Embed the Figure in a Tkinter Canvas
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.canvas = FigureCanvasTkAgg(self.fig, master=master)
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+        # Compact columns, like the simulation's CustomerStore
+        self.customer_ids = array('q')
+        self.wait_times = array('q')
+        self.window = window
+        self.bars = None
+        self._background = None
+
         self.clear() # Set initial state
 
     def get_tk_widget(self):
         return self.canvas.get_tk_widget()
 
-    def clear(self):
-        self.customer_ids.clear()
-        self.wait_times.clear()
+    def _reset_axes(self):
         self.ax.clear()
         self.ax.set_title("Customer Wait Time Analysis", fontsize=14, fontweight='bold')
         self.ax.set_xlabel("Customer ID", fontsize=10)
         self.ax.set_ylabel("Wait Time (Minutes)", fontsize=10)
-        self.ax.text(0.5, 0.5, "Waiting for simulation data...", 
+
+    def clear(self):
+        del self.customer_ids[:]
+        del self.wait_times[:]
+        self.bars = None
+        self._reset_axes()
+        self.ax.text(0.5, 0.5, "Waiting for simulation data...",
                      ha='center', va='center', transform=self.ax.transAxes, fontsize=12, color='gray')
         self.canvas.draw()
 
     def update_plot(self, customer, stress_threshold):
+        self.add_customers([customer], stress_threshold)
+
+    def add_customers(self, customers, stress_threshold):
+        """Adds bars for a batch of finished customers and repaints once."""
+        if not customers:
+            return
         # If this is the first data point, clear the "waiting" message
-        if not self.customer_ids:
-            self.ax.clear()
-            self.ax.set_title("Customer Wait Time Analysis", fontsize=14, fontweight='bold')
-            self.ax.set_xlabel("Customer ID", fontsize=10)
-            self.ax.set_ylabel("Wait Time (Minutes)", fontsize=10)
-
-        # Add new data
-        self.customer_ids.append(customer.id)
-        self.wait_times.append(customer.wait_time)
-        
-        color = '#c62828' if customer.wait_time > stress_threshold else '#4f46e5' # Red or Indigo
-        
-        # Add the new bar to the plot
-        self.ax.bar(customer.id, customer.wait_time, color=color)
-        self.ax.set_xlim(left=0.5, right=max(self.customer_ids) + 0.5)
-        
+        if self.bars is None:
+            self._reset_axes()
+            self.bars = LineCollection([], animated=True)
+            self.ax.add_collection(self.bars)
+            self.ax.set_xlim(0.5, 10.5)
+            self.ax.set_ylim(0, 10)
+
+        self.customer_ids.extend(customer.id for customer in customers)
+        self.wait_times.extend(customer.wait_time for customer in customers)
+
+        limits_changed = self._update_limits()
+        self._update_bars(stress_threshold)
+
+        if limits_changed or self._background is None:
+            self._background = None # Stale until the full redraw has run
+            self.canvas.draw_idle()
+        else:
+            self.canvas.restore_region(self._background)
+            self.ax.draw_artist(self.bars)
+            self.canvas.blit(self.ax.bbox)
+
+    def _visible(self):
+        """IDs and waits of the customers inside the current x-limits."""
+        ids = np.frombuffer(self.customer_ids, dtype=np.int64)[-self.window:]
+        waits = np.frombuffer(self.wait_times, dtype=np.int64)[-self.window:]
+        inside = ids > self.ax.get_xlim()[0]
+        return ids[inside], waits[inside]
+
+    def _update_limits(self):
+        """Grows or slides the axes when new data falls outside; returns True if they changed."""
+        left, right = self.ax.get_xlim()
+        bottom, top = self.ax.get_ylim()
+        newest = max(self.customer_ids[-self.window:])
+
+        if newest > right:
+            if newest <= self.window:
+                right = min(self.window, max(10, newest * AXIS_HEADROOM)) + 0.5
+                left = 0.5
+            else:
+                # Slide in quarter-window steps so the axes are redrawn only occasionally
+                step = max(1, self.window // 4)
+                left = (newest - self.window) // step * step + step + 0.5
+                right = left + self.window
+        highest = max(self.wait_times[-self.window:])
+        if highest >= top:
+            top = highest * AXIS_HEADROOM + 1
+
+        changed = (left, right, top) != (*self.ax.get_xlim(), self.ax.get_ylim()[1])
+        if changed:
+            self.ax.set_xlim(left, right)
+            self.ax.set_ylim(bottom, top)
+        return changed
+
+    def _update_bars(self, stress_threshold):
+        ids, waits = self._visible()
+        segments = np.zeros((ids.size, 2, 2))
+        segments[:, :, 0] = ids[:, None]
+        segments[:, 1, 1] = waits
+        self.bars.set_segments(segments)
+        self.bars.set_color(np.where((waits > stress_threshold)[:, None], STRESSED_COLOR, NORMAL_COLOR))
+
+        # Bar width in points: 80% of the horizontal space per customer
+        left, right = self.ax.get_xlim()
+        axes_points = self.ax.bbox.width * 72 / self.fig.dpi
+        self.bars.set_linewidth(max(0.5, 0.8 * axes_points / (right - left)))
+
+    def _on_draw(self, event):
+        """Caches the static background after each full draw, then paints the bars on top."""
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        if self.bars is not None:
+            self.ax.draw_artist(self.bars)
+
+
+class TimelinePlot:
+    """Queue length, customers in system and teller busy fraction over simulated time.
+
+    Draws the bucketed series of Simulation.get_timeline(); the number of
+    buckets is bounded, so a redraw costs the same on any horizon. Like
+    SimulationPlot, master=None renders on an off-screen Agg canvas.
+    """
+
+    def __init__(self, master):
+        self.fig, self.ax = plt.subplots(figsize=(8, 2.5), dpi=100)
+        self.fig.patch.set_facecolor('#ffffff')
+        if master is None:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            self.canvas = FigureCanvasAgg(self.fig)
+        else:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.canvas = FigureCanvasTkAgg(self.fig, master=master)
+
+        self.busy_ax = self.ax.twinx()
+        self.queue_line, = self.ax.plot([], [], color=NORMAL_COLOR, label="Queue length")
+        self.system_line, = self.ax.plot([], [], color='#00897b', label="In system") # Teal
+        self.busy_line, = self.busy_ax.plot([], [], color=STRESSED_COLOR, alpha=0.6, label="Busy fraction")
+        self.ax.set_title("Queue Over Time", fontsize=12, fontweight='bold')
+        self.ax.set_xlabel("Time (Minutes)", fontsize=10)
+        self.ax.set_ylabel("Customers (avg)", fontsize=10)
+        self.busy_ax.set_ylabel("Busy fraction", fontsize=10)
+        self.busy_ax.set_ylim(0, 1.05)
+        self.busy_ax.grid(False)
+        self.ax.legend(handles=[self.queue_line, self.system_line, self.busy_line], loc='upper left', fontsize=8, frameon=True, framealpha=0.9)
+        self.fig.tight_layout()
+        self.clear()
+
+    def get_tk_widget(self):
+        return self.canvas.get_tk_widget()
+
+    def clear(self):
+        for line in (self.queue_line, self.system_line, self.busy_line):
+            line.set_data([], [])
+        self.ax.set_xlim(0, 1)
+        self.ax.set_ylim(0, 1)
+        self.canvas.draw_idle()
+
+    def update_series(self, series):
+        """Replaces the plotted series with a new get_timeline() result and repaints."""
+        if not series or not series['start']:
+            return
+        # Step lines: each bucket's average is held from its start to its end
+        times = np.column_stack([series['start'], series['end']]).ravel()
+        for line, key in ((self.queue_line, 'queue_length'), (self.system_line, 'in_system'),
+                          (self.busy_line, 'busy_fraction')):
+            line.set_data(times, np.repeat(series[key], 2))
+        self.ax.set_xlim(0, max(1, series['end'][-1]))
+        self.ax.set_ylim(0, max(1, max(series['in_system'])) * AXIS_HEADROOM)
         self.canvas.draw_idle()
@@ -0,0 +1,252 @@
+# processes.py
+#
+# Pluggable arrival and service processes for Simulation. By default the engine
+# draws randint(1, max_arrival) gaps and randint(1, max_service) service times;
+# passing `arrivals=` / `services=` replaces those with one of the processes
+# below. Random samples are drawn from NumPy in blocks and handed out one at a
+# time, so the per-event cost is an index increment rather than an RNG call.
+#
+# The engine works in whole minutes with at most one arrival per minute, so
+# every sample is rounded to the nearest minute, with a floor of 1 minute.
+
+import bisect
+import itertools
+import math
+
+import numpy as np
+
+DEFAULT_BLOCK = 4096
+
+
+def _whole_minutes(value):
+    return max(1, round(value))
+
+
+class BlockSampler:
+    """Base class for i.i.d. samplers that refill a NumPy buffer in blocks."""
+
+    def __init__(self, rng=None, block=DEFAULT_BLOCK):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.block = block
+        self._buffer = []
+        self._index = 0
+
+    def _draw(self, size):
+        raise NotImplementedError
+
+    def sample_float(self):
+        if self._index >= len(self._buffer):
+            self._buffer = self._draw(self.block).tolist()
+            self._index = 0
+        value = self._buffer[self._index]
+        self._index += 1
+        return value
+
+    def sample(self):
+        """Next sample in whole minutes; this is what Simulation calls for service times."""
+        return _whole_minutes(self.sample_float())
+
+
+class Exponential(BlockSampler):
+    def __init__(self, mean, rng=None, block=DEFAULT_BLOCK):
+        super().__init__(rng, block)
+        self.mean = mean
+
+    def _draw(self, size):
+        return self.rng.exponential(self.mean, size)
+
+
+class Lognormal(BlockSampler):
+    """Lognormal with the given mean and shape `sigma` (std of the underlying normal)."""
+
+    def __init__(self, mean, sigma, rng=None, block=DEFAULT_BLOCK):
+        super().__init__(rng, block)
+        self.mean = mean
+        self.sigma = sigma
+        self.mu = math.log(mean) - sigma ** 2 / 2
+
+    def _draw(self, size):
+        return self.rng.lognormal(self.mu, self.sigma, size)
+
+
+class UniformInt(BlockSampler):
+    """Integers in [low, high], like the default random.randint draws."""
+
+    def __init__(self, low, high, rng=None, block=DEFAULT_BLOCK):
+        super().__init__(rng, block)
+        self.low = low
+        self.high = high
+
+    def _draw(self, size):
+        return self.rng.integers(self.low, self.high + 1, size)
+
+
+class RenewalArrivals:
+    """Arrivals whose gaps are i.i.d. draws from a sampler (e.g. Exponential for Poisson arrivals)."""
+
+    def __init__(self, gaps):
+        self.gaps = gaps
+
+    def next_gap(self, now):
+        return self.gaps.sample()
+
+
+class PiecewiseRateArrivals:
+    """Non-homogeneous Poisson arrivals from a piecewise-constant rate schedule.
+
+    `schedule` is a list of (start_minute, arrivals_per_minute) pairs sorted by
+    start; each rate holds until the next start. With `period` (e.g. 1440 for a
+    day) the schedule repeats. Arrivals are generated by thinning: candidates
+    come from a Poisson process at the peak rate and are kept with probability
+    rate(t) / peak, with candidate gaps and acceptance draws made in blocks.
+    """
+
+    def __init__(self, schedule, period=None, rng=None, block=DEFAULT_BLOCK):
+        self.starts = [start for start, _ in schedule]
+        self.rates = [rate for _, rate in schedule]
+        self.period = period
+        self.peak = max(self.rates)
+        self.candidates = Exponential(1 / self.peak, rng, block) if self.peak > 0 else None
+        self.acceptance = np.random.default_rng() if rng is None else rng
+        self.block = block
+        self._uniforms = []
+        self._index = 0
+        # Without a period, the rate stays 0 for good from the start of a trailing run of zero rates
+        self._closes = math.inf
+        if not period:
+            for start, rate in reversed(schedule):
+                if rate > 0:
+                    break
+                self._closes = start
+        # Continuous time of the last accepted arrival; kept apart from the engine
+        # clock so rounding and bunched arrivals never shift the rate profile
+        self._clock = 0.0
+
+    def rate(self, t):
+        if self.period:
+            t %= self.period
+        index = bisect.bisect_right(self.starts, t) - 1
+        return self.rates[index] if index >= 0 else 0.0
+
+    def _uniform(self):
+        if self._index >= len(self._uniforms):
+            self._uniforms = self.acceptance.random(self.block).tolist()
+            self._index = 0
+        value = self._uniforms[self._index]
+        self._index += 1
+        return value
+
+    def next_gap(self, now):
+        if self.candidates is None:
+            return math.inf
+        while True:
+            self._clock += self.candidates.sample_float()
+            if self._clock >= self._closes:
+                return math.inf
+            if self._uniform() * self.peak < self.rate(self._clock):
+                return _whole_minutes(self._clock - now)
+
+
+class TraceReplay:
+    """Replays recorded arrivals (and optionally service times) from a file.
+
+    Text files hold one customer per line, `arrival_time[,service_time]`
+    (commas or whitespace; lines starting with '#' are skipped) and are read
+    lazily line by line. `.npy` files holding an (n, 2) or (n,) array are
+    memory-mapped. Either way the whole trace is never loaded at once.
+
+    Use `.arrivals` and `.services` as the Simulation processes; the service
+    time handed out belongs to the customer whose arrival was read last.
+    A trace without a service column (judged by its first row) has
+    `.services` None, so the engine's own service draws, or another service
+    process, fill in. When the trace ends no further customers arrive.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if str(path).endswith(".npy"):
+            data = np.load(path, mmap_mode='r')
+            rows = (row if data.ndim > 1 else (row,) for row in data)
+        else:
+            rows = self._read_text(path)
+        first = next(rows, None)
+        self._rows = itertools.chain((first,), rows) if first is not None else rows
+        self._current = None
+        self.arrivals = _TraceArrivals(self)
+        self.services = _TraceServices(self) if first is not None and len(first) > 1 else None
+
+    @staticmethod
+    def _read_text(path):
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                fields = line.replace(',', ' ').split()
+                try:
+                    yield [float(field) for field in fields]
+                except ValueError:
+                    continue  # header row
+
+    def _advance(self):
+        self._current = next(self._rows, None)
+        return self._current
+
+
+class _TraceArrivals:
+    def __init__(self, trace):
+        self.trace = trace
+
+    def next_gap(self, now):
+        row = self.trace._advance()
+        if row is None:
+            return math.inf
+        return _whole_minutes(float(row[0]) - now)
+
+
+class _TraceServices:
+    def __init__(self, trace):
+        self.trace = trace
+
+    def sample(self):
+        row = self.trace._current
+        if row is None or len(row) < 2:
+            raise ValueError(f"trace {self.trace.path} has no service time for this customer")
+        return _whole_minutes(float(row[1]))
+
+
+def process_rngs(seed):
+    """Independent NumPy generators for the arrival and the service process of one run.
+
+    Samplers draw in blocks, so processes sharing one generator would shift each
+    other's draws; separate streams keep arrivals identical when only the service
+    process changes (common random numbers).
+    """
+    return tuple(np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(2))
+
+
+def parse_process(spec, kind, rng=None):
+    """Builds an arrival or service process from a compact text spec.
+
+    kind is 'arrivals' or 'services'. Specs:
+      exp:MEAN                      exponential (Poisson arrivals)
+      lognormal:MEAN:SIGMA          lognormal
+      uniform:LOW:HIGH              integer uniform
+      schedule:START=RATE,...[@PERIOD]  piecewise arrival rates per minute (arrivals only)
+    """
+    name, _, args = spec.partition(':')
+    if name == 'schedule':
+        if kind != 'arrivals':
+            raise ValueError("schedule specs only describe arrivals")
+        pairs, _, period = args.partition('@')
+        schedule = [tuple(float(x) for x in pair.split('=')) for pair in pairs.split(',')]
+        return PiecewiseRateArrivals(schedule, period=float(period) if period else None, rng=rng)
+
+    values = [float(x) for x in args.split(':')] if args else []
+    samplers = {'exp': Exponential, 'lognormal': Lognormal, 'uniform': UniformInt}
+    if name not in samplers:
+        raise ValueError(f"unknown process '{name}' in '{spec}'")
+    if name == 'uniform':
+        values = [int(x) for x in values]
+    sampler = samplers[name](*values, rng=rng)
+    return RenewalArrivals(sampler) if kind == 'arrivals' else sampler
@@ -0,0 +1,82 @@
+# queues.py
+#
+# Waiting-line containers for Simulation. Each discipline exposes the same
+# small interface (push, pop, len) so the engine never cares which one it has.
+# Queues hold CustomerStore row numbers rather than Customer views, so an
+# overloaded run's waiting line costs one int (plus a key for the heaps) per
+# customer; the heaps read their keys from the store's columns.
+
+import heapq
+from array import array
+from enum import Enum, auto
+
+class QueueDiscipline(Enum): #the order in which waiting customers are picked up
+    FIFO = auto()              # first come, first served
+    SHORTEST_SERVICE = auto()  # shortest service time first
+    PRIORITY = auto()          # lowest priority class first, FIFO within a class
+
+class FifoQueue:
+    """First-come-first-served queue of rows in a typed array: O(1) push, amortized O(1) pop.
+
+    Popped rows stay in front of `_head` until they make up half the array.
+    """
+
+    def __init__(self, store=None):
+        self._rows = array('q')
+        self._head = 0
+
+    def push(self, row):
+        self._rows.append(row)
+
+    def pop(self):
+        if self._head >= len(self._rows):
+            raise IndexError("pop from an empty queue")
+        row = self._rows[self._head]
+        self._head += 1
+        if self._head * 2 >= len(self._rows):
+            del self._rows[:self._head]
+            self._head = 0
+        return row
+
+    def __len__(self):
+        return len(self._rows) - self._head
+
+    def __iter__(self):
+        return iter(self._rows[self._head:])
+
+class _HeapQueue:
+    """Heap-backed queue of (key, row) ordered by one store column, ties broken by arrival order."""
+
+    column = None
+
+    def __init__(self, store):
+        self._heap = []
+        self._keys = getattr(store, self.column)  # the array grows in place, so the reference stays valid
+
+    def push(self, row):
+        heapq.heappush(self._heap, (self._keys[row], row))
+
+    def pop(self):
+        return heapq.heappop(self._heap)[1]
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __iter__(self):
+        return (row for _, row in sorted(self._heap))
+
+class ShortestServiceQueue(_HeapQueue):
+    column = 'service_time'
+
+class PriorityQueue(_HeapQueue):
+    column = 'priority'
+
+QUEUE_TYPES = {
+    QueueDiscipline.FIFO: FifoQueue,
+    QueueDiscipline.SHORTEST_SERVICE: ShortestServiceQueue,
+    QueueDiscipline.PRIORITY: PriorityQueue,
+}
+
+def make_queue(discipline, store):
+    """An empty queue for `discipline` over the rows of `store` (a CustomerStore)."""
+    return QUEUE_TYPES[discipline](store)
@@ -0,0 +1,199 @@
+# replication.py
+#
+# Monte Carlo replications of one simulation configuration. Each replication
+# gets its own seed spawned from a single SeedSequence, so runs are
+# independent of each other, of the worker they land on, and reproducible
+# from one root seed. Replications are spread over a process pool.
+#
+# run_paired compares two configurations with common random numbers: both see
+# the same per-replication seeds, hence the same arrivals, so the confidence
+# interval on their difference is much tighter than with independent runs.
+
+import math
+import os
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch import BatchSimulation
+from processes import parse_process, process_rngs
+from queues import QueueDiscipline
+from simulation import Simulation, SimulationMode
+
+# Summary fields that are averaged across replications
+REPLICATION_METRICS = ('avg_wait', 'max_wait', 'total_served', 'utilization')
+# Fewer degrees of freedom than this get exact t quantiles
+EXACT_T_DF = 10
+
+
+def t_quantile(p, df):
+    """Student-t quantile.
+
+    Below EXACT_T_DF degrees of freedom (few replications, where the expansion
+    is far off: 11.3 instead of 12.71 at df=1) the exact CDF is inverted by
+    Newton's method. Otherwise the Cornish-Fisher expansion around the normal
+    quantile is within 1e-4.
+    """
+    z = statistics.NormalDist().inv_cdf(p)
+    if math.isinf(df):
+        return z
+    t = (z
+         + (z**3 + z) / (4 * df)
+         + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * df**2)
+         + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * df**3)
+         + (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / (92160 * df**4))
+    if df >= EXACT_T_DF or df != int(df):
+        return t
+    df = int(df)
+    log_density = math.lgamma((df + 1) / 2) - math.lgamma(df / 2) - math.log(df * math.pi) / 2
+    for _ in range(50):
+        density = math.exp(log_density - (df + 1) / 2 * math.log1p(t * t / df))
+        step = (_t_cdf(t, df) - p) / density
+        t -= step
+        if abs(step) <= 1e-12 * max(1.0, abs(t)):
+            break
+    return t
+
+
+def _t_cdf(t, df):
+    # Closed form for integer df (Abramowitz & Stegun 26.7.3-4) in theta = atan(t / sqrt(df))
+    theta = math.atan(t / math.sqrt(df))
+    cos_squared = math.cos(theta) ** 2
+    term = total = 1.0
+    if df % 2:
+        for k in range(1, (df - 1) // 2):
+            term *= cos_squared * 2 * k / (2 * k + 1)
+            total += term
+        inside = 2 / math.pi * (theta + (math.sin(theta) * math.cos(theta) * total if df > 1 else 0))
+    else:
+        for k in range(1, df // 2):
+            term *= cos_squared * (2 * k - 1) / (2 * k)
+            total += term
+        inside = math.sin(theta) * total
+    return (1 + inside) / 2  # `inside` is P(|T| < t)
+
+
+def confidence_interval(values, confidence=0.95):
+    """Returns mean, sample std and the t-based confidence interval of `values`."""
+    values = list(values)
+    mean = statistics.fmean(values) if values else 0.0
+    std = statistics.stdev(values) if len(values) > 1 else 0.0
+    if len(values) > 1:
+        half_width = t_quantile(0.5 + confidence / 2, len(values) - 1) * std / math.sqrt(len(values))
+    else:
+        half_width = math.inf
+    return {'mean': mean, 'std': std, 'half_width': half_width,
+            'low': mean - half_width, 'high': mean + half_width}
+
+
+def spawn_seeds(seed, count):
+    """Spawns `count` independent child seeds (as plain ints) from one root seed."""
+    children = np.random.SeedSequence(seed).spawn(count)
+    return [int.from_bytes(child.generate_state(4, np.uint32).tobytes(), 'little') for child in children]
+
+
+def check_batch_options(tellers=1, discipline=QueueDiscipline.FIFO, arrival_spec=None, service_spec=None, **options):
+    """Raises ValueError for options the vectorized engine would silently ignore."""
+    if tellers != 1 or discipline != QueueDiscipline.FIFO:
+        raise ValueError("use_batch only supports one teller with the FIFO discipline")
+    if arrival_spec or service_spec or options.get('arrivals') or options.get('services'):
+        raise ValueError("use_batch only supports the default uniform arrival and service draws")
+
+
+def _run_replication(job):
+    """Worker entry point; runs one replication and returns its summary."""
+    seed, duration, max_arrival, max_service, stress_threshold, use_batch, options = job
+    options = dict(options)
+    # Processes are stateful, so each replication builds its own from the text specs
+    arrival_spec = options.pop('arrival_spec', None)
+    service_spec = options.pop('service_spec', None)
+    if arrival_spec or service_spec:
+        arrival_rng, service_rng = process_rngs(seed)
+        options['arrivals'] = parse_process(arrival_spec, 'arrivals', arrival_rng) if arrival_spec else None
+        options['services'] = parse_process(service_spec, 'services', service_rng) if service_spec else None
+    if use_batch:
+        simulation = BatchSimulation(duration, max_arrival, max_service, seed=seed).run()
+    else:
+        simulation = Simulation(duration, max_arrival, max_service, mode=SimulationMode.EVENT,
+                                seed=seed, build_messages=False, **options).run()
+    summary = simulation.get_summary(stress_threshold)
+    return {key: summary[key] for key in REPLICATION_METRICS}
+
+
+def _run_jobs(jobs, workers):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [_run_replication(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Hand out jobs in chunks so short replications are not dominated by IPC
+        chunksize = max(1, len(jobs) // (workers * 4))
+        return list(executor.map(_run_replication, jobs, chunksize=chunksize))
+
+
+def run_replications(duration, max_arrival, max_service, replications, stress_threshold=10,
+                     seed=None, workers=None, confidence=0.95, use_batch=False, **options):
+    """Runs independent replications of one configuration and aggregates their summaries.
+
+    Extra keyword options (tellers, discipline, priority_classes) go to Simulation;
+    `arrival_spec` / `service_spec` take processes.parse_process specs.
+    `use_batch` runs the vectorized single-teller FIFO engine instead. With
+    workers=1 everything runs in this process.
+
+    Returns a dict with the root seed, the per-replication summaries and, for
+    each metric in REPLICATION_METRICS, its mean, std and confidence interval.
+    """
+    if use_batch:
+        check_batch_options(**options)
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    jobs = [(child, duration, max_arrival, max_service, stress_threshold, use_batch, options)
+            for child in spawn_seeds(seed, replications)]
+
+    results = _run_jobs(jobs, workers)
+
+    return {
+        'seed': seed,
+        'replications': replications,
+        'confidence': confidence,
+        'results': results,
+        'metrics': {key: confidence_interval((r[key] for r in results), confidence)
+                    for key in REPLICATION_METRICS},
+    }
+
+
+def run_paired(duration, max_arrival, max_service, replications, baseline, alternative,
+               stress_threshold=10, seed=None, workers=None, confidence=0.95):
+    """Compares two configurations over the same replication seeds (common random numbers).
+
+    `baseline` and `alternative` are dicts of overrides for the shared settings,
+    e.g. {'tellers': 2} vs {'tellers': 3}; they may also override
+    max_arrival, max_service or duration. Returns each side's metrics and the
+    confidence interval of (alternative - baseline) for every metric.
+    """
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    seeds = spawn_seeds(seed, replications)
+    shared = {'duration': duration, 'max_arrival': max_arrival, 'max_service': max_service}
+
+    jobs = []
+    for overrides in (baseline, alternative):
+        settings = {**shared, **overrides}
+        options = {key: value for key, value in settings.items() if key not in shared}
+        jobs += [(child, settings['duration'], settings['max_arrival'], settings['max_service'],
+                  stress_threshold, False, options) for child in seeds]
+    results = _run_jobs(jobs, workers)
+    base_results, alt_results = results[:replications], results[replications:]
+
+    return {
+        'seed': seed,
+        'replications': replications,
+        'confidence': confidence,
+        'baseline': {key: confidence_interval((r[key] for r in base_results), confidence)
+                     for key in REPLICATION_METRICS},
+        'alternative': {key: confidence_interval((r[key] for r in alt_results), confidence)
+                        for key in REPLICATION_METRICS},
+        'difference': {key: confidence_interval((a[key] - b[key] for a, b in zip(alt_results, base_results)),
+                                                confidence)
+                       for key in REPLICATION_METRICS},
+    }
@@ -0,0 +1,249 @@
+# runner.py
+#
+# Runs a Simulation off the Tk thread so the GUI only draws. The worker steps
+# the engine in batches and puts one message per batch on a bounded queue: the
+# batch's events, the customers who finished and a get_summary() snapshot. The
+# GUI drains the queue on a timer. When the GUI falls behind, the full queue
+# blocks the worker, so a max-speed run never buffers more than a few frames
+# ahead of the screen.
+#
+# SimulationRunner steps on a thread. Pure-Python stepping holds the GIL, so
+# that keeps the window responsive but shares one core with Tk.
+# SimulationProcess runs the same loop in a child process on a second core;
+# its messages are plain data (finished customers as FinishedCustomer tuples)
+# so they pickle cheaply. Pause, resume and stop go through SimulationState.
+# The worker is the only thread that steps or summarizes the simulation.
+
+import multiprocessing
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from simulation import SimulationState
+
+QUEUE_BATCHES = 8  # Batches buffered ahead of the GUI
+TIMELINE_SECONDS = 0.25  # Minimum wall time between published timeline series
+MAX_SPEED_BATCH_MS = 25  # Stepping time per batch when no step count is set
+_POLL_SECONDS = 0.1  # How often a blocked worker rechecks for stop
+
+# What the chart needs of a finished customer, without a view into the engine's store
+FinishedCustomer = namedtuple('FinishedCustomer', 'id wait_time')
+
+
+class SimulationRunner:
+    """Steps one Simulation on a daemon thread and publishes batches to `batches`.
+
+    Each message is a dict with 'events', 'finished' (FinishedCustomer tuples),
+    'summary', 'timeline', 'state' and 'final'. 'timeline' carries a
+    get_timeline() series at most every TIMELINE_SECONDS and in the last
+    message, and is None otherwise. The last message of a run has final=True
+    and a FINISHED or STOPPED state. After stop() nobody is expected to
+    drain, so a stopped run's last messages are dropped if the queue is full.
+    `steps_per_batch` and `interval` may be changed while running: None steps
+    for MAX_SPEED_BATCH_MS per batch; otherwise each batch is that many steps,
+    followed by a pause of `interval` seconds.
+
+    With `profile`, the worker runs under the simulation's instrumentation
+    profiler (cProfile only sees the thread it was enabled on).
+    """
+
+    def __init__(self, simulation, stress_threshold, steps_per_batch=1, interval=0.05, profile=False):
+        self.simulation = simulation
+        self.stress_threshold = stress_threshold
+        self.steps_per_batch = steps_per_batch
+        self.interval = interval
+        self.profile = profile and simulation.instrument is not None
+        self.batches = queue.Queue(maxsize=QUEUE_BATCHES)
+        self._wake = threading.Event()  # set by resume() and stop()
+        self._timeline_due = 0.0
+        self._thread = threading.Thread(target=self._work, name="simulation", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def pause(self):
+        if self.simulation.state == SimulationState.RUNNING:
+            self.simulation.state = SimulationState.PAUSED
+
+    def resume(self):
+        if self.simulation.state == SimulationState.PAUSED:
+            self.simulation.state = SimulationState.RUNNING
+            self._wake.set()
+
+    def stop(self):
+        if self.simulation.state in (SimulationState.RUNNING, SimulationState.PAUSED):
+            self.simulation.state = SimulationState.STOPPED
+        self._wake.set()
+
+    @property
+    def paused(self):
+        return self.simulation.state == SimulationState.PAUSED
+
+    def drain(self, limit=None):
+        """Returns the batches published so far without blocking (at most `limit`)."""
+        batches = []
+        while limit is None or len(batches) < limit:
+            try:
+                batches.append(self.batches.get_nowait())
+            except queue.Empty:
+                break
+        return batches
+
+    def _work(self):
+        if self.profile:
+            with self.simulation.instrument.profiling():
+                self._run()
+        else:
+            self._run()
+        stopped = self.simulation.state == SimulationState.STOPPED
+        self._publish([], final=True, summary=not stopped)
+
+    def _run(self):
+        simulation = self.simulation
+        while True:
+            if simulation.state == SimulationState.PAUSED:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            if simulation.state != SimulationState.RUNNING:
+                break
+            events = self._step_batch()
+            self._publish(events)
+            if self.steps_per_batch is not None and simulation.state == SimulationState.RUNNING:
+                # Paced playback; stop() and resume() cut the wait short
+                self._wake.wait(self.interval)
+                self._wake.clear()
+
+    def _step_batch(self):
+        simulation = self.simulation
+        steps_per_batch = self.steps_per_batch
+        deadline = time.perf_counter() + MAX_SPEED_BATCH_MS / 1000
+        events = []
+        steps = 0
+        while simulation.state == SimulationState.RUNNING:
+            events += simulation.step()
+            steps += 1
+            if steps_per_batch is not None and steps >= steps_per_batch:
+                break
+            if steps_per_batch is None and time.perf_counter() >= deadline:
+                break
+        return events
+
+    def _publish(self, events, final=False, summary=True):
+        timeline = None
+        if summary and (final or time.perf_counter() >= self._timeline_due):
+            timeline = self.simulation.get_timeline()
+            self._timeline_due = time.perf_counter() + TIMELINE_SECONDS
+        # Finish events drop their Customer view, so messages never reference the store
+        finished = [event.pop('customer') for event in events if event['type'] == 'finish']
+        message = {
+            'events': events,
+            'finished': [FinishedCustomer(customer.id, customer.wait_time) for customer in finished],
+            'summary': self.simulation.get_summary(self.stress_threshold) if summary else None,
+            'timeline': timeline,
+            'state': self.simulation.state,
+            'final': final,
+        }
+        while True:
+            try:
+                self.batches.put(message, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                if self.simulation.state == SimulationState.STOPPED:
+                    return  # nobody is draining any more
+
+
+class SimulationProcess:
+    """SimulationRunner's interface, with the engine stepping in a child process.
+
+    The child restores a snapshot of `simulation` and runs a SimulationRunner
+    over it, so stepping no longer competes with Tk for the GIL. The parent's
+    `simulation` is left where it was. Pause, resume, stop and changes to
+    `steps_per_batch` or `interval` are sent over a command queue.
+    Instrumentation hooks and profiling stay in this process, so instrumented
+    runs need SimulationRunner. After stop(), drain() returns nothing: the child
+    exits without flushing its queue, which may be left holding half a message.
+    """
+
+    def __init__(self, simulation, stress_threshold, steps_per_batch=1, interval=0.05):
+        import snapshot
+        self.simulation = simulation
+        self._steps_per_batch = steps_per_batch
+        self._interval = interval
+        self._paused = False
+        self._stopped = False
+        self.batches = multiprocessing.Queue(maxsize=QUEUE_BATCHES)
+        self._commands = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_run_in_process, name="simulation", daemon=True,
+            args=(snapshot.snapshot(simulation), stress_threshold, steps_per_batch, interval,
+                  self.batches, self._commands))
+
+    def start(self):
+        self._process.start()
+        return self
+
+    @property
+    def steps_per_batch(self):
+        return self._steps_per_batch
+
+    @steps_per_batch.setter
+    def steps_per_batch(self, steps_per_batch):
+        self._steps_per_batch = steps_per_batch
+        self._commands.put(('speed', steps_per_batch, self._interval))
+
+    @property
+    def interval(self):
+        return self._interval
+
+    @interval.setter
+    def interval(self, interval):
+        self._interval = interval
+        self._commands.put(('speed', self._steps_per_batch, interval))
+
+    def pause(self):
+        self._paused = True
+        self._commands.put(('pause',))
+
+    def resume(self):
+        self._paused = False
+        self._commands.put(('resume',))
+
+    def stop(self):
+        self._stopped = True
+        self._commands.put(('stop',))
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def drain(self, limit=None):
+        if self._stopped:
+            return []
+        return SimulationRunner.drain(self, limit)
+
+
+def _run_in_process(data, stress_threshold, steps_per_batch, interval, batches, commands):
+    import snapshot
+    runner = SimulationRunner(snapshot.restore(data), stress_threshold, steps_per_batch, interval)
+    runner.batches = batches
+
+    def obey():
+        while True:
+            command, *values = commands.get()
+            if command == 'speed':
+                runner.steps_per_batch, runner.interval = values
+            elif command == 'pause':
+                runner.pause()
+            elif command == 'resume':
+                runner.resume()
+            elif command == 'stop':
+                runner.stop()
+                return
+
+    threading.Thread(target=obey, daemon=True).start()
+    runner._work()
+    if runner.simulation.state == SimulationState.STOPPED:
+        batches.cancel_join_thread()  # nobody drains any more; exit without flushing
@@ -1,42 +1,226 @@
+import heapq
 import random
+import secrets
 from enum import Enum, auto
 
+from queues import QueueDiscipline, make_queue
+from stats import QueueTimeline, RunningStats
+from store import Customer, CustomerStore
+
+# Bumped whenever a change alters simulated results, so cached results are not reused
+ENGINE_VERSION = 2
+
 class SimulationState(Enum): #the state at which the simuation is
     READY = auto()
     RUNNING = auto()
     FINISHED = auto()
     STOPPED = auto()
+    PAUSED = auto()  # held by runner.SimulationRunner until resumed
+
+class SimulationMode(Enum): #how the simulation clock moves forward
+    TICK = auto()   # one simulated minute per step
+    EVENT = auto()  # jump straight to the next scheduled event
+
+# Independent random streams derived from one seed. Keeping arrivals, service
+# times and priority classes apart gives common random numbers: two runs with
+# the same seed see the same arrivals even if service times or staffing differ.
+RANDOM_STREAMS = ('arrivals', 'services', 'priorities')
 
-class Customer:
-    def __init__(self, id, arrival_time, service_time):
-        self.id = id
-        self.arrival_time = arrival_time
-        self.service_time = service_time
-        self.start_time = None  
-        self.wait_time = None   
+def new_seed():
+    """Fresh seed for runs that were not given one, so they can still be replayed."""
+    return secrets.randbits(63)
+
+# Order of events that fall on the same minute, mirroring the tick loop:
+# arrivals first, then free tellers pick up work, then departures.
+EVENT_PRIORITY = {'arrival': 0, 'service': 1, 'finish': 2}
 
 class Simulation: #To manage the entire state and logic of the queueing simulation.
-    def __init__(self, duration, max_arrival, max_service):
+    def __init__(self, duration, max_arrival, max_service, mode=SimulationMode.TICK,
+                 tellers=1, discipline=QueueDiscipline.FIFO, priority_classes=1, rng=None,
+                 build_messages=True, arrivals=None, services=None, seed=None, instrument=None,
+                 timeline_buckets=None):
         self.duration = duration
         self.max_arrival = max_arrival
         self.max_service = max_service
+        self.mode = mode
+        self.tellers = tellers
+        self.discipline = discipline
+        self.priority_classes = priority_classes  # class 1 is served first under PRIORITY
+        # An explicit rng (anything with randint(), e.g. random.Random or the random
+        # module itself) feeds every draw from one shared stream and is never reseeded.
+        # Otherwise each run draws from per-purpose streams seeded from self.seed.
+        self.rng = rng
+        self.seed = None if rng is not None else (seed if seed is not None else new_seed())
+        # Optional processes from processes.py replacing the randint draws (see there)
+        self.arrivals = arrivals
+        self.services = services
+        # Events always carry structured fields; their 'message' text is only built on request
+        self.build_messages = build_messages
+        # With a bucket count, queue length, customers in system and busy tellers
+        # are tracked over time in at most that many buckets (see stats.QueueTimeline)
+        self.timeline_buckets = timeline_buckets
         self.reset()
+        # Optional instrumentation.Instrumentation; it swaps in timed step/get_summary
+        # on this instance only, so uninstrumented runs keep the plain methods
+        self.instrument = instrument
+        if instrument is not None:
+            instrument.attach(self)
+
+    def reset(self, seed=None):
+        """Restarts the run. Seeded runs replay the same draws unless a new seed is given."""
+        if seed is not None:
+            self.reseed(seed)
+        elif self.rng is not None:
+            self._arrival_rng = self._service_rng = self._priority_rng = self.rng
+        else:
+            self.reseed(self.seed)
 
-    def reset(self):
         self.time = 0
-        self.queue = []
-        self.all_customers = []
+        self.all_customers = CustomerStore()  # one compact row per arrival; Customer objects are views
+        self.queue = make_queue(self.discipline, self.all_customers)  # holds store rows
+        self.stats = RunningStats(waits=self.all_customers.wait_time)
+        self.timeline = QueueTimeline(self.tellers, self.timeline_buckets) if self.timeline_buckets else None
         self.id_counter = 1
-        self.current_customer = None
-        self.service_end_time = 0
-        self.total_busy_time = 0
+        self.in_service = [None] * self.tellers
+        self.busy_tellers = 0
+        self.service_end_times = [0] * self.tellers
+        self.teller_busy_time = [0] * self.tellers  # busy minutes of completed services
+        # Heap of (time the teller can next start a service, teller index)
+        self.free_tellers = [(0, teller) for teller in range(self.tellers)]
         self.state = SimulationState.RUNNING
+        self._calendar = []  # heap of (time, priority, teller, seq, type) for event mode
+        self._event_seq = 0
         self._set_next_arrival()
+        if self.mode == SimulationMode.EVENT:
+            self._schedule(self.next_arrival, 'arrival')
+
+    def reseed(self, seed):
+        """Switches every draw from here on to the per-purpose streams of `seed`."""
+        self.rng = None
+        self.seed = seed
+        self._arrival_rng, self._service_rng, self._priority_rng = (
+            random.Random(f"{seed}:{stream}") for stream in RANDOM_STREAMS)
+
+    def _export_state(self):
+        """The complete engine state as picklable data; _from_state() rebuilds the run from it."""
+        streams = [self._arrival_rng, self._service_rng, self._priority_rng]
+        return {
+            'settings': {
+                'duration': self.duration, 'max_arrival': self.max_arrival, 'max_service': self.max_service,
+                'mode': self.mode.name, 'tellers': self.tellers, 'discipline': self.discipline.name,
+                'priority_classes': self.priority_classes, 'build_messages': self.build_messages,
+                'seed': self.seed, 'timeline_buckets': self.timeline_buckets,
+                # Processes carry their own NumPy generators and buffers; TraceReplay cannot be pickled
+                'arrivals': self.arrivals, 'services': self.services,
+            },
+            # A shared rng (explicit rng=...) is one stream; restored runs get it back as one random.Random
+            'shared_rng': self.rng is not None,
+            'rng_states': [stream.getstate() for stream in (streams[:1] if self.rng is not None else streams)],
+            'clock': {
+                'time': self.time, 'state': self.state.name, 'id_counter': self.id_counter,
+                'next_arrival': self.next_arrival, 'event_seq': self._event_seq,
+            },
+            'queue': list(self.queue),  # store rows, in pop order
+            'in_service': [customer.row if customer else -1 for customer in self.in_service],
+            'service_end_times': list(self.service_end_times),
+            'teller_busy_time': list(self.teller_busy_time),
+            'free_tellers': list(self.free_tellers),
+            'calendar': list(self._calendar),
+            'stats': self.stats.export_state(),
+            'timeline': self.timeline,  # plain lists and counters
+            'customers': {name: getattr(self.all_customers, name).tobytes() for name in CustomerStore.COLUMNS},
+        }
+
+    @classmethod
+    def _from_state(cls, state, **settings):
+        """Rebuilds a run from _export_state() data, with any of its settings replaced by `settings`.
+
+        The run is built and reset() as usual, then the saved state is written
+        over it. A `seed` among `settings` reseeds the streams from this point
+        on. Hooks from an Instrumentation are not carried over.
+        """
+        reseed = 'seed' in settings
+        settings = {**state['settings'], **settings}
+        discipline = settings.pop('discipline')
+        if isinstance(discipline, str):
+            discipline = QueueDiscipline[discipline]
+        seed, arrivals, services = settings.pop('seed'), settings.pop('arrivals'), settings.pop('services')
+        # Built without the processes, so reset() draws nothing from the saved ones
+        simulation = cls(settings.pop('duration'), settings.pop('max_arrival'), settings.pop('max_service'),
+                         mode=SimulationMode[settings.pop('mode')], discipline=discipline,
+                         seed=state['settings']['seed'], **settings)
+        simulation.arrivals, simulation.services = arrivals, services
+
+        streams = []
+        for rng_state in state['rng_states']:
+            stream = random.Random()
+            stream.setstate(rng_state)
+            streams.append(stream)
+        if state['shared_rng']:
+            simulation.rng, simulation.seed = streams[0], None
+            streams *= 3
+        simulation._arrival_rng, simulation._service_rng, simulation._priority_rng = streams
+        if reseed:
+            simulation.reseed(seed)
+
+        store = simulation.all_customers
+        for name, raw in state['customers'].items():
+            getattr(store, name).frombytes(raw)
+        clock = state['clock']
+        simulation.time = clock['time']
+        simulation.state = SimulationState[clock['state']]
+        simulation.id_counter = clock['id_counter']
+        simulation.next_arrival = clock['next_arrival']
+        simulation._event_seq = clock['event_seq']
+        for row in state['queue']:
+            simulation.queue.push(row)
+        simulation.in_service = [Customer(store, row) if row >= 0 else None for row in state['in_service']]
+        simulation.busy_tellers = sum(customer is not None for customer in simulation.in_service)
+        simulation.service_end_times = state['service_end_times']
+        simulation.teller_busy_time = state['teller_busy_time']
+        simulation.free_tellers = state['free_tellers']
+        simulation._calendar = state['calendar']
+        simulation.stats.restore_state(state['stats'])
+        simulation.timeline = state['timeline']
+        return simulation
+
+    @property
+    def total_busy_time(self):
+        return sum(self.teller_busy_times())
+
+    def teller_busy_times(self):
+        """Busy minutes per teller so far, including the elapsed part of services in progress."""
+        busy = list(self.teller_busy_time)
+        for teller, customer in enumerate(self.in_service):
+            if customer:
+                busy[teller] += min(self.time, self.service_end_times[teller]) - customer.start_time
+        return busy
 
     def _set_next_arrival(self):
-        self.next_arrival = self.time + random.randint(1, self.max_arrival)
+        if self.arrivals is not None:
+            self.next_arrival = self.time + self.arrivals.next_gap(self.time)
+        else:
+            self.next_arrival = self.time + self._arrival_rng.randint(1, self.max_arrival)
+
+    def _schedule(self, time, event_type, teller=-1):
+        heapq.heappush(self._calendar, (time, EVENT_PRIORITY[event_type], teller, self._event_seq, event_type))
+        self._event_seq += 1
+
+    def _teller_available(self):
+        return self.free_tellers and self.free_tellers[0][0] <= self.time
+
+    def run(self):
+        """Steps the simulation until it finishes or is stopped."""
+        while self.state == SimulationState.RUNNING:
+            self.step()
+        return self
 
     def step(self):
+        if self.mode == SimulationMode.EVENT:
+            return self._step_event()
+        return self._step_tick()
+
+    def _step_tick(self):
         if self.time >= self.duration:
             self.state = SimulationState.FINISHED
             return []
@@ -45,83 +229,175 @@ class Simulation: #To manage the entire state and logic of the queueing simulati
 
         # Event 1: A new customer arrives
         if self.time == self.next_arrival:
-            service_time = random.randint(1, self.max_service)
-            customer = Customer(self.id_counter, self.time, service_time)
-            self.queue.append(customer)
-            self.all_customers.append(customer)
-            events.append({
-                'type': 'arrival',
-                'message': f"[T={self.time}] Customer {self.id_counter} arrived (needs {service_time} mins). Queue: {len(self.queue)}"
-            })
-            self.id_counter += 1
-            self._set_next_arrival()
-
-        # Event 2: making The server free to serve the next customer
-        if self.current_customer is None and self.queue:
-            self.current_customer = self.queue.pop(0)
-            self.current_customer.start_time = self.time
-            self.current_customer.wait_time = self.time - self.current_customer.arrival_time
-            self.service_end_time = self.time + self.current_customer.service_time
-            events.append({
-                'type': 'service',
-                'message': f"[T={self.time}] Serving Customer {self.current_customer.id} (waited {self.current_customer.wait_time} mins). Queue: {len(self.queue)}"
-            })
-
-        # Event 3: The server finishes with the current customer
-        if self.current_customer and self.time >= self.service_end_time:
-            events.append({
-                'type': 'finish',
-                'message': f"[T={self.time}] Finished with Customer {self.current_customer.id}.",
-                'customer': self.current_customer
-            })
-            self.current_customer = None
-
-        # Update server busy time metric
-        if self.current_customer:
-            self.total_busy_time += 1
-            
+            events.append(self._arrive())
+
+        # Event 2: making the free tellers serve the next customers
+        while self.queue and self._teller_available():
+            events.append(self._start_service())
+
+        # Event 3: Tellers finish with their current customers
+        for teller in range(self.tellers):
+            if self.in_service[teller] and self.time >= self.service_end_times[teller]:
+                events.append(self._finish_service(teller))
+
         self.time += 1
         return events
 
+    def _step_event(self):
+        """Processes every event due at the next event time on the calendar."""
+        if not self._calendar or self._calendar[0][0] >= self.duration:
+            self.time = self.duration
+            self.state = SimulationState.FINISHED
+            return []
+
+        now = self._calendar[0][0]
+        self.time = now
+
+        events = []
+        while self._calendar and self._calendar[0][0] == now:
+            _, _, teller, _, event_type = heapq.heappop(self._calendar)
+
+            if event_type == 'arrival':
+                events.append(self._arrive())
+                self._schedule(self.next_arrival, 'arrival')
+                self._schedule(now, 'service')
+
+            elif event_type == 'service':
+                # A stale start (no teller or customer left by now) simply does nothing
+                while self.queue and self._teller_available():
+                    event = self._start_service()
+                    events.append(event)
+                    self._schedule(self.service_end_times[event['teller']], 'finish', event['teller'])
+
+            elif event_type == 'finish':
+                events.append(self._finish_service(teller))
+                # Like the tick loop, a freed teller picks up the next customer a minute later
+                if self.queue:
+                    self._schedule(now + 1, 'service')
+
+        return events
+
+    def _arrive(self):
+        service_time = self.services.sample() if self.services is not None else self._service_rng.randint(1, self.max_service)
+        priority = self._priority_rng.randint(1, self.priority_classes) if self.priority_classes > 1 else 1
+        row = self.all_customers.add(self.time, service_time, priority)
+        self.queue.push(row)
+        if self.timeline is not None:
+            self.timeline.update(self.time, len(self.queue), self.busy_tellers)
+        event = self._event('arrival', row + 1, None, service_time=service_time)
+        self.id_counter += 1
+        self._set_next_arrival()
+        return event
+
+    def _event(self, event_type, customer_id, teller, **fields):
+        event = {'type': event_type, 'time': self.time, 'customer_id': customer_id,
+                 'teller': teller, 'queue_length': len(self.queue), **fields}
+        if self.build_messages:
+            event['message'] = format_event(event, self.tellers > 1)
+        return event
+
+    def _start_service(self):
+        _, teller = heapq.heappop(self.free_tellers)
+        row = self.queue.pop()
+        store = self.all_customers
+        store.start(row, self.time)
+        wait_time = store.wait_time[row]
+        self.stats.add_wait(wait_time)
+        self.in_service[teller] = Customer(store, row)  # a view only for the few customers being served
+        self.busy_tellers += 1
+        self.service_end_times[teller] = self.time + store.service_time[row]
+        if self.timeline is not None:
+            self.timeline.update(self.time, len(self.queue), self.busy_tellers)
+        return self._event('service', row + 1, teller, wait_time=wait_time)
+
+    def _finish_service(self, teller):
+        customer = self.in_service[teller]
+        event = self._event('finish', customer.id, teller, customer=customer)
+        self.teller_busy_time[teller] += customer.service_time
+        self.in_service[teller] = None
+        self.busy_tellers -= 1
+        heapq.heappush(self.free_tellers, (self.time + 1, teller))
+        if self.timeline is not None:
+            self.timeline.update(self.time, len(self.queue), self.busy_tellers)
+        return event
+
     def get_summary(self, stress_threshold):
-        served = [c for c in self.all_customers if c.wait_time is not None]
-        
-        if not served:
-            return {
-                'avg_wait': 0, 'max_wait': 0, 'total_served': 0,
-                'utilization': 0, 'messages': ["No customers were served."],
-                'insight': {'text': 'N/A', 'color': 'black'}
-            }
-
-        wait_times = [c.wait_time for c in served]
-        avg_wait = sum(wait_times) / len(served)
-        max_wait = max(wait_times) if wait_times else 0
-        utilization = (self.total_busy_time / self.time) * 100 if self.time > 0 else 0
-        
-        stressed_customers = [c for c in served if c.wait_time > stress_threshold]
-        stress_percent = (len(stressed_customers) / len(served)) * 100
-
-        summary_messages = [
-            f"Total customers served: {len(served)}",
-            f"Average wait time: {avg_wait:.2f} minutes",
-            f"Maximum wait time: {max_wait} minutes",
-            f"Server utilization: {utilization:.2f}%"
-        ]
-
-        if stress_percent == 0:
-            insight = {'text': "Excellent Performance: All customers were served quickly.", 'color': "#2e7d32"} # Green
-        elif stress_percent < 25:
-            insight = {'text': f"Good Performance: System is mostly smooth, though {len(stressed_customers)} customer(s) experienced long waits.", 'color': "#f9a825"} # Yellow
-        elif stress_percent < 50:
-            insight = {'text': f"Under Pressure: Almost half of customers waited longer than {stress_threshold} minutes.", 'color': "#ef6c00"} # Orange
-        else:
-            insight = {'text': "System Overloaded: A majority of customers faced unacceptable wait times.", 'color': "#c62828"} # Red
+        """Summarizes the run so far from running aggregates, without walking the customer list."""
+        stats = self.stats
+        teller_utilization = [(busy / self.time) * 100 if self.time > 0 else 0 for busy in self.teller_busy_times()]
+        summary = build_summary(stats.count, stats.total_wait, stats.max_wait, stats.stressed_count(stress_threshold),
+                                teller_utilization, stress_threshold, stats.quantiles())
+        summary['seed'] = self.seed
+        return summary
+
+    def get_timeline(self):
+        """Per-bucket time-weighted series up to now (see QueueTimeline.series), or None if not tracked."""
+        return self.timeline.series(self.time) if self.timeline is not None else None
+
+
+def format_event(event, multi_teller=False):
+    """Renders the log line for an event dict returned by Simulation.step()."""
+    teller = f" at Teller {event['teller'] + 1}" if multi_teller and event['teller'] is not None else ""
+    if event['type'] == 'arrival':
+        return f"[T={event['time']}] Customer {event['customer_id']} arrived (needs {event['service_time']} mins). Queue: {event['queue_length']}"
+    if event['type'] == 'service':
+        return f"[T={event['time']}] Serving Customer {event['customer_id']}{teller} (waited {event['wait_time']} mins). Queue: {event['queue_length']}"
+    return f"[T={event['time']}] Finished with Customer {event['customer_id']}{teller}."
+
 
+def build_summary(total_served, total_wait, max_wait, stressed_count, teller_utilization, stress_threshold,
+                  wait_quantiles=None):
+    """Builds the summary dict shown in the GUI from aggregate run figures.
+
+    `teller_utilization` holds one busy percentage per teller; the headline
+    utilization is their mean. `wait_quantiles` maps keys such as 'p95_wait'
+    to wait-time percentiles and is merged into the summary as is.
+    """
+    wait_quantiles = wait_quantiles or {}
+    if not total_served:
         return {
-            'avg_wait': avg_wait,
-            'max_wait': max_wait,
-            'total_served': len(served),
-            'utilization': utilization,
-            'messages': summary_messages,
-            'insight': insight
+            'avg_wait': 0, 'max_wait': 0, 'total_served': 0,
+            'utilization': 0, 'teller_utilization': [0] * len(teller_utilization),
+            **{key: 0 for key in wait_quantiles},
+            'messages': ["No customers were served."],
+            'insight': {'text': 'N/A', 'color': 'black'}
         }
+
+    utilization = sum(teller_utilization) / len(teller_utilization)
+
+    avg_wait = total_wait / total_served
+    stress_percent = (stressed_count / total_served) * 100
+
+    summary_messages = [
+        f"Total customers served: {total_served}",
+        f"Average wait time: {avg_wait:.2f} minutes",
+        f"Maximum wait time: {max_wait} minutes",
+        f"Server utilization: {utilization:.2f}%"
+    ]
+    if len(teller_utilization) > 1:
+        summary_messages += [f"  Teller {teller} utilization: {busy:.2f}%"
+                             for teller, busy in enumerate(teller_utilization, start=1)]
+    if wait_quantiles:
+        labels = "/".join(key.split("_")[0].upper() for key in wait_quantiles)
+        values = " / ".join(f"{value:.1f}" for value in wait_quantiles.values())
+        summary_messages.append(f"Wait time {labels}: {values} minutes")
+
+    if stress_percent == 0:
+        insight = {'text': "Excellent Performance: All customers were served quickly.", 'color': "#2e7d32"} # Green
+    elif stress_percent < 25:
+        insight = {'text': f"Good Performance: System is mostly smooth, though {stressed_count} customer(s) experienced long waits.", 'color': "#f9a825"} # Yellow
+    elif stress_percent < 50:
+        insight = {'text': f"Under Pressure: Almost half of customers waited longer than {stress_threshold} minutes.", 'color': "#ef6c00"} # Orange
+    else:
+        insight = {'text': "System Overloaded: A majority of customers faced unacceptable wait times.", 'color': "#c62828"} # Red
+
+    return {
+        'avg_wait': avg_wait,
+        'max_wait': max_wait,
+        'total_served': total_served,
+        'utilization': utilization,
+        'teller_utilization': teller_utilization,
+        **wait_quantiles,
+        'messages': summary_messages,
+        'insight': insight
+    }
@@ -0,0 +1,247 @@
+# stats.py
+#
+# Constant-time running statistics for live summaries. Simulation feeds every
+# wait time in as the customer starts service, so get_summary never has to
+# walk the customer list.
+
+import math
+
+# Wait-time percentiles reported in every summary
+SUMMARY_QUANTILES = (0.50, 0.95, 0.99)
+# Waits below this many minutes are counted per value; longer ones, which only
+# pile up in overloaded runs, share one counter so the counts stay bounded
+WAIT_COUNT_LIMIT = 1440
+
+
+class P2Quantile:
+    """Streaming quantile estimate with the P-square algorithm (Jain & Chlamtac, 1985).
+
+    Keeps five markers whose heights track the minimum, p/2, p, (1+p)/2 and
+    maximum quantiles, adjusting them with a piecewise-parabolic fit after each
+    observation. O(1) time and memory per update, no samples kept.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        self.count += 1
+        heights = self.heights
+        if self.count <= 5:
+            heights.append(x)
+            heights.sort()
+            return
+
+        if x < heights[0]:
+            heights[0] = x
+            k = 0
+        elif x >= heights[4]:
+            heights[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= heights[k + 1]:
+                k += 1
+
+        positions = self.positions
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in range(1, 4):
+            d = self.desired[i] - positions[i]
+            if (d >= 1 and positions[i + 1] - positions[i] > 1) or (d <= -1 and positions[i - 1] - positions[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + d * (heights[i + d] - heights[i]) / (positions[i + d] - positions[i])
+                heights[i] = height
+                positions[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self):
+        if self.count == 0:
+            return 0
+        if self.count <= 5:
+            # Too few points for the markers yet; interpolate the exact sample
+            rank = self.p * (self.count - 1)
+            low = math.floor(rank)
+            high = min(low + 1, self.count - 1)
+            return self.heights[low] + (rank - low) * (self.heights[high] - self.heights[low])
+        return self.heights[2]
+
+
+class RunningStats:
+    """Running wait-time aggregates: count, sum, max, stressed count and quantile sketches.
+
+    `waits` is the sequence of every wait so far (the CustomerStore's wait_time
+    column, where customers not yet served hold -1). It is only read to
+    recount stressed customers for a threshold of WAIT_COUNT_LIMIT or more.
+    """
+
+    def __init__(self, quantiles=SUMMARY_QUANTILES, waits=None):
+        self.count = 0
+        self.total_wait = 0
+        self.max_wait = 0
+        self.sketches = [P2Quantile(p) for p in quantiles]
+        # Exact counts per (integer) wait, so the stress threshold can change mid-run
+        self.wait_counts = {}
+        self.long_waits = 0  # waits of WAIT_COUNT_LIMIT or more
+        self.waits = waits
+        self._stress_threshold = None
+        self._stressed = 0
+
+    def add_wait(self, wait):
+        self.count += 1
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+        if wait < WAIT_COUNT_LIMIT:
+            self.wait_counts[wait] = self.wait_counts.get(wait, 0) + 1
+        else:
+            self.long_waits += 1
+        if self._stress_threshold is not None and wait > self._stress_threshold:
+            self._stressed += 1
+        for sketch in self.sketches:
+            sketch.add(wait)
+
+    def stressed_count(self, stress_threshold):
+        """Customers who waited longer than the threshold; recounted only when it changes."""
+        if stress_threshold != self._stress_threshold:
+            if stress_threshold < WAIT_COUNT_LIMIT:
+                self._stressed = self.long_waits + sum(
+                    n for wait, n in self.wait_counts.items() if wait > stress_threshold)
+            elif self.waits is not None:
+                self._stressed = sum(wait > stress_threshold for wait in self.waits)
+            else:
+                raise ValueError(f"a stress threshold of {WAIT_COUNT_LIMIT} minutes or more needs `waits`")
+            self._stress_threshold = stress_threshold
+        return self._stressed
+
+    def export_state(self):
+        """Counts and sketch markers as plain data; restore_state() loads them back."""
+        return {
+            'count': self.count, 'total_wait': self.total_wait, 'max_wait': self.max_wait,
+            'wait_counts': dict(self.wait_counts), 'long_waits': self.long_waits,
+            'sketches': [(s.p, s.count, list(s.heights), list(s.positions), list(s.desired)) for s in self.sketches],
+        }
+
+    def restore_state(self, state):
+        self.count = state['count']
+        self.total_wait = state['total_wait']
+        self.max_wait = state['max_wait']
+        self.wait_counts = state['wait_counts']
+        self.long_waits = state['long_waits']
+        self.sketches = []
+        for p, count, heights, positions, desired in state['sketches']:
+            sketch = P2Quantile(p)
+            sketch.count, sketch.heights, sketch.positions, sketch.desired = count, heights, positions, desired
+            self.sketches.append(sketch)
+        self._stress_threshold = None
+
+    def quantiles(self):
+        """Returns {'p50_wait': ..., 'p95_wait': ..., ...} from the sketches."""
+        return {quantile_key(sketch.p): sketch.value() for sketch in self.sketches}
+
+
+def quantile_key(p):
+    return f"p{round(p * 100)}_wait"
+
+
+class QueueTimeline:
+    """Time-weighted queue length, number in system and busy tellers per time bucket.
+
+    Simulation reports every state change with update(); the time each value
+    was held is added to the buckets it spans, so bucket averages are exact
+    whatever the event spacing. Buckets start `width` minutes wide. Whenever
+    there would be more than `max_buckets`, neighbouring pairs are merged and
+    the width doubles, so memory stays bounded on any horizon while the
+    averages stay exact (only the resolution coarsens). Per-bucket peaks of the
+    queue length are kept alongside, so short spikes survive the merging.
+    """
+
+    def __init__(self, tellers, max_buckets=512, width=1):
+        self.tellers = tellers
+        self.max_buckets = max(2, max_buckets)
+        self.width = width
+        self.queue_area = []
+        self.system_area = []
+        self.busy_area = []
+        self.queue_peak = []
+        self._time = 0
+        self._queue_length = 0
+        self._busy = 0
+
+    def update(self, time, queue_length, busy):
+        """Records that from `time` on the queue holds `queue_length` and `busy` tellers serve."""
+        if time > self._time:
+            self._accumulate(time)
+        self._queue_length = queue_length
+        self._busy = busy
+        index = self._bucket(time)
+        if queue_length > self.queue_peak[index]:
+            self.queue_peak[index] = queue_length
+
+    def _bucket(self, time):
+        """Index of the bucket holding `time`, growing (and if needed merging) the buckets."""
+        index = int(time // self.width)
+        while index >= self.max_buckets:
+            self._merge()
+            index = int(time // self.width)
+        while index >= len(self.queue_area):
+            self.queue_area.append(0)
+            self.system_area.append(0)
+            self.busy_area.append(0)
+            self.queue_peak.append(0)
+        return index
+
+    def _accumulate(self, end):
+        time = self._time
+        queue_length, busy = self._queue_length, self._busy
+        while time < end:
+            index = self._bucket(time)
+            span = min(end, (index + 1) * self.width) - time
+            self.queue_area[index] += queue_length * span
+            self.system_area[index] += (queue_length + busy) * span
+            self.busy_area[index] += busy * span
+            if queue_length > self.queue_peak[index]:
+                self.queue_peak[index] = queue_length
+            time += span
+        self._time = end
+
+    def _merge(self):
+        for name in ('queue_area', 'system_area', 'busy_area'):
+            values = getattr(self, name)
+            setattr(self, name, [sum(values[i:i + 2]) for i in range(0, len(values), 2)])
+        self.queue_peak = [max(self.queue_peak[i:i + 2]) for i in range(0, len(self.queue_peak), 2)]
+        self.width *= 2
+
+    def series(self, now):
+        """Per-bucket averages up to `now`: start, end, queue_length, in_system, busy_fraction, queue_peak."""
+        if now > self._time:
+            self._accumulate(now)
+        rows = {'start': [], 'end': [], 'queue_length': [], 'in_system': [], 'busy_fraction': [], 'queue_peak': []}
+        for index in range(len(self.queue_area)):
+            start = index * self.width
+            end = min(start + self.width, now)
+            if end <= start:
+                break
+            span = end - start
+            rows['start'].append(start)
+            rows['end'].append(end)
+            rows['queue_length'].append(self.queue_area[index] / span)
+            rows['in_system'].append(self.system_area[index] / span)
+            rows['busy_fraction'].append(self.busy_area[index] / (span * self.tellers))
+            rows['queue_peak'].append(self.queue_peak[index])
+        return rows
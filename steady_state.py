@@ -0,0 +1,147 @@
+# steady_state.py
+#
+# Steady-state estimates from a single long run. get_summary averages every
+# customer, including the start-up period when the bank opens empty, which
+# biases waits low. Here:
+#   - mser5() finds the warm-up to discard with MSER-5 (White, 1997): average
+#     the waits in batches of 5 and truncate where the standard error of the
+#     remaining mean is smallest
+#   - batch_means() turns the remaining (correlated) waits into a confidence
+#     interval by grouping them into a fixed number of batches
+#   - run_until_precise() steps a Simulation until that interval is narrow
+#     enough, instead of always simulating a fixed duration
+
+import numpy as np
+
+from replication import confidence_interval
+from simulation import SimulationState, build_summary
+from stats import SUMMARY_QUANTILES, quantile_key
+
+MSER_BATCH = 5
+DEFAULT_BATCHES = 20  # batch means; few enough that batch averages are nearly independent
+MIN_BATCH_SIZE = 10
+FIRST_CHECK = 1000  # customers served before the first precision check
+CHECK_GROWTH = 1.5  # later checks come at geometrically growing counts, so checking stays O(n)
+
+
+def mser5(values, batch_size=MSER_BATCH):
+    """Number of leading observations to drop as warm-up (a multiple of `batch_size`).
+
+    Only the first half of the data is considered for truncation; if the
+    minimum lies at that limit the run is too short to have reached steady state.
+    """
+    values = np.asarray(values, dtype=float)
+    count = values.size // batch_size
+    if count < 2:
+        return 0
+    means = values[:count * batch_size].reshape(count, batch_size).mean(axis=1)
+    # Sums over means[d:] for every truncation point d, via reversed cumulative sums
+    tail_sum = np.cumsum(means[::-1])[::-1]
+    tail_squares = np.cumsum(means[::-1] ** 2)[::-1]
+    remaining = np.arange(count, 0, -1)
+    statistic = (tail_squares - tail_sum ** 2 / remaining) / remaining ** 2
+    return int(np.argmin(statistic[:count // 2 + 1])) * batch_size
+
+
+def batch_means(values, batches=DEFAULT_BATCHES, confidence=0.95):
+    """Mean and confidence interval of correlated observations from `batches` equal batches.
+
+    Leftover observations that do not fill the last batch are dropped. Returns
+    the confidence_interval() dict plus 'batches' and 'batch_size'; with too
+    few observations the half-width is infinite.
+    """
+    values = np.asarray(values, dtype=float)
+    batch_size = values.size // batches
+    if batch_size < 1:
+        return {**confidence_interval([], confidence), 'batches': 0, 'batch_size': 0}
+    averages = values[:batches * batch_size].reshape(batches, batch_size).mean(axis=1)
+    return {**confidence_interval(averages.tolist(), confidence), 'batches': batches, 'batch_size': batch_size}
+
+
+def started_waits(simulation):
+    """Waits of the customers who have started service, in arrival order.
+
+    Stops at the first customer still waiting, so under non-FIFO disciplines
+    long waiters are not left out in favour of later, luckier arrivals.
+    """
+    waits = simulation.all_customers.column('wait_time')
+    waiting = np.flatnonzero(waits < 0)
+    return waits[:waiting[0]] if waiting.size else waits
+
+
+def estimate(waits, batches=DEFAULT_BATCHES, confidence=0.95):
+    """Warm-up truncated batch-means estimate of the average wait."""
+    warmup = mser5(waits)
+    steady = waits[warmup:]
+    interval = batch_means(steady, batches, confidence)
+    return {
+        **interval,
+        'warmup_customers': warmup,
+        'customers': int(len(waits)),
+        # Truncating at MSER's search limit means the run never settled
+        'warmup_detected': warmup < (len(waits) // MSER_BATCH // 2) * MSER_BATCH,
+        'sufficient': interval['batch_size'] >= MIN_BATCH_SIZE,
+    }
+
+
+def run_until_precise(simulation, half_width=None, relative_precision=None, batches=DEFAULT_BATCHES,
+                      confidence=0.95):
+    """Steps `simulation` until the steady-state average wait is known precisely enough.
+
+    The run stops once the batch-means confidence interval half-width (after
+    MSER-5 truncation) is at most `half_width` minutes, or at most
+    `relative_precision` times the mean, whichever targets are given. Its
+    duration is the upper limit: a run that reaches it without converging
+    (e.g. an overloaded queue that never settles) returns converged=False.
+
+    Returns the estimate() dict plus 'converged' and 'time', the simulated
+    minutes used. The simulation is left as it stopped, so get_summary() and
+    get_timeline() still describe the run.
+    """
+    if half_width is None and relative_precision is None:
+        raise ValueError("give a half_width or relative_precision target")
+    next_check = FIRST_CHECK
+    result = None
+    while simulation.state == SimulationState.RUNNING:
+        simulation.step()
+        if simulation.stats.count < next_check:
+            continue
+        next_check = int(simulation.stats.count * CHECK_GROWTH)
+        result = estimate(started_waits(simulation), batches, confidence)
+        if _precise(result, half_width, relative_precision):
+            break
+
+    result = estimate(started_waits(simulation), batches, confidence)
+    result['converged'] = _precise(result, half_width, relative_precision)
+    result['time'] = simulation.time
+    return result
+
+
+def _precise(result, half_width, relative_precision):
+    if not (result['sufficient'] and result['warmup_detected']):
+        return False
+    if half_width is not None and result['half_width'] > half_width:
+        return False
+    if relative_precision is not None and result['half_width'] > relative_precision * abs(result['mean']):
+        return False
+    return True
+
+
+def steady_state_summary(simulation, stress_threshold, batches=DEFAULT_BATCHES, confidence=0.95):
+    """get_summary() with the warm-up customers removed from every wait figure.
+
+    Utilization still covers the whole run. The batch-means interval of the
+    average wait is added under 'avg_wait_half_width', with the truncation in
+    'warmup_customers'.
+    """
+    waits = started_waits(simulation)
+    result = estimate(waits, batches, confidence)
+    steady = waits[result['warmup_customers']:]
+    full = simulation.get_summary(stress_threshold)
+    quantiles = np.quantile(steady, SUMMARY_QUANTILES) if steady.size else [0] * len(SUMMARY_QUANTILES)
+    summary = build_summary(int(steady.size), int(steady.sum()), int(steady.max(initial=0)),
+                            int((steady > stress_threshold).sum()), full['teller_utilization'], stress_threshold,
+                            {quantile_key(p): float(q) for p, q in zip(SUMMARY_QUANTILES, quantiles)})
+    summary.update(seed=full['seed'], avg_wait_half_width=result['half_width'],
+                   warmup_customers=result['warmup_customers'], warmup_detected=result['warmup_detected'])
+    return summary
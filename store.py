@@ -0,0 +1,116 @@
+# store.py
+#
+# Columnar storage for every customer of a run. Instead of one Python object
+# (with its own __dict__) per arrival, each field lives in a compact growable
+# typed array, 32 bytes per customer in total. Customer objects are
+# created on demand as thin __slots__ views over one row.
+
+from array import array
+
+# Stored in place of None for customers that have not started service yet
+NOT_STARTED = -1
+
+
+class CustomerStore:
+    """Growable typed-array columns: arrival, service, priority, start and wait.
+
+    Customer ids are implicit: row i holds customer i + 1.
+    """
+
+    COLUMNS = {
+        'arrival_time': 'q',
+        'service_time': 'i',
+        'priority': 'i',
+        'start_time': 'q',
+        'wait_time': 'q',
+    }
+
+    def __init__(self):
+        for name, typecode in self.COLUMNS.items():
+            setattr(self, name, array(typecode))
+
+    def add(self, arrival_time, service_time, priority=1):
+        """Appends a new arrival and returns its row."""
+        self.arrival_time.append(arrival_time)
+        self.service_time.append(service_time)
+        self.priority.append(priority)
+        self.start_time.append(NOT_STARTED)
+        self.wait_time.append(NOT_STARTED)
+        return len(self.arrival_time) - 1
+
+    def start(self, row, start_time):
+        self.start_time[row] = start_time
+        self.wait_time[row] = start_time - self.arrival_time[row]
+
+    def column(self, name):
+        """NumPy copy of one column (ids are derived with np.arange).
+
+        A copy rather than a frombuffer view: a live view would pin the array's
+        buffer, and the next append to the store would raise BufferError.
+        """
+        import numpy as np
+        if name == 'id':
+            return np.arange(1, len(self) + 1)
+        values = getattr(self, name)
+        return np.frombuffer(values, dtype=values.typecode).copy()
+
+    def nbytes(self):
+        return sum(getattr(self, name).itemsize * len(self) for name in self.COLUMNS)
+
+    def __len__(self):
+        return len(self.arrival_time)
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("customer row out of range")
+        return Customer(self, row)
+
+    def __iter__(self):
+        return (Customer(self, row) for row in range(len(self)))
+
+
+class Customer:
+    """Read/write view over one row of a CustomerStore."""
+
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    @property
+    def id(self):
+        return self.row + 1
+
+    @property
+    def arrival_time(self):
+        return self.store.arrival_time[self.row]
+
+    @property
+    def service_time(self):
+        return self.store.service_time[self.row]
+
+    @property
+    def priority(self):
+        return self.store.priority[self.row]
+
+    @property
+    def start_time(self):
+        start = self.store.start_time[self.row]
+        return None if start == NOT_STARTED else start
+
+    @property
+    def wait_time(self):
+        wait = self.store.wait_time[self.row]
+        return None if wait == NOT_STARTED else wait
+
+    def __eq__(self, other):
+        return isinstance(other, Customer) and self.store is other.store and self.row == other.row
+
+    def __hash__(self):
+        return hash((id(self.store), self.row))
+
+    def __repr__(self):
+        return f"Customer(id={self.id}, arrival_time={self.arrival_time}, service_time={self.service_time})"
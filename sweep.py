@@ -0,0 +1,162 @@
+# sweep.py
+#
+# Capacity-planning grid over max_arrival x max_service x duration x tellers.
+# Each grid cell is a set of replications (see replication.py); cells run in
+# parallel and their results are memoized on disk, keyed by the cell
+# parameters, seed and ENGINE_VERSION, so re-running or extending a sweep only
+# computes the cells that are new.
+
+import csv
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+
+import numpy as np
+
+from analytic import estimate
+from replication import check_batch_options, run_replications
+from simulation import ENGINE_VERSION
+
+DEFAULT_CACHE_DIR = ".sweep_cache"
+
+SWEEP_DTYPE = np.dtype([
+    ('max_arrival', np.int32),
+    ('max_service', np.int32),
+    ('duration', np.int64),
+    ('tellers', np.int32),
+    ('avg_wait', np.float64),
+    ('avg_wait_half_width', np.float64),
+    ('max_wait', np.float64),
+    ('total_served', np.float64),
+    ('utilization', np.float64),
+    ('analytic_avg_wait', np.float64),
+    ('occupancy', np.float64),
+])
+
+
+def _cell_key(cell, settings):
+    return json.dumps({'engine_version': ENGINE_VERSION, **cell, **settings}, sort_keys=True)
+
+
+def _cache_path(cache_dir, key):
+    return os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+
+def _load_cached(cache_dir, key):
+    try:
+        with open(_cache_path(cache_dir, key)) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Guard against hash collisions and half-written files
+    return entry['row'] if entry.get('key') == key else None
+
+
+def _store_cached(cache_dir, key, row):
+    path = _cache_path(cache_dir, key)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({'key': key, 'row': row}, f)
+    os.replace(tmp_path, path)
+
+
+def _run_cell(job):
+    """Worker entry point; runs every replication of one grid cell."""
+    cell, settings = job
+    result = run_replications(cell['duration'], cell['max_arrival'], cell['max_service'],
+                              settings['replications'], stress_threshold=settings['stress_threshold'],
+                              seed=settings['seed'], workers=1, use_batch=settings['use_batch'],
+                              tellers=cell['tellers'])
+    metrics = result['metrics']
+    return {
+        **cell,
+        'avg_wait': metrics['avg_wait']['mean'],
+        'avg_wait_half_width': metrics['avg_wait']['half_width'],
+        'max_wait': metrics['max_wait']['mean'],
+        'total_served': metrics['total_served']['mean'],
+        'utilization': metrics['utilization']['mean'],
+    }
+
+
+def run_sweep(max_arrivals, max_services, durations, tellers=(1,), replications=1, seed=0,
+              stress_threshold=10, use_batch=False, workers=None, cache_dir=DEFAULT_CACHE_DIR,
+              prune_unstable=False):
+    """Evaluates every grid point and returns a NumPy structured array (SWEEP_DTYPE).
+
+    Every cell reuses the same root seed, so neighbouring cells are driven by
+    the same replication streams and a cell's result does not depend on what
+    else is in the grid. Pass cache_dir=None to disable the on-disk cache.
+    `use_batch` needs tellers=(1,); other teller counts raise ValueError.
+
+    Every row also carries the analytic steady-state estimate (analytic.py).
+    With prune_unstable=True, cells whose teller occupancy is 100% or more are
+    not simulated at all: their simulated columns are NaN and their analytic
+    wait is infinite.
+    """
+    if use_batch:
+        for count in tellers:
+            check_batch_options(tellers=count)
+    settings = {'replications': replications, 'seed': seed,
+                'stress_threshold': stress_threshold, 'use_batch': use_batch}
+    cells = [{'max_arrival': a, 'max_service': s, 'duration': d, 'tellers': c}
+             for a, s, d, c in itertools.product(max_arrivals, max_services, durations, tellers)]
+
+    analytic = [estimate(cell['max_arrival'], cell['max_service'], cell['tellers']) for cell in cells]
+    rows = [None] * len(cells)
+    pending = []
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    for index, cell in enumerate(cells):
+        if prune_unstable and not analytic[index]['stable']:
+            rows[index] = {**cell, **{name: np.nan for name in SWEEP_DTYPE.names if name not in cell}}
+            continue
+        cached = _load_cached(cache_dir, _cell_key(cell, settings)) if cache_dir else None
+        if cached is None:
+            pending.append(index)
+        else:
+            rows[index] = cached
+
+    jobs = [(cells[index], settings) for index in pending]
+    workers = workers or os.cpu_count() or 1
+    with ExitStack() as stack:
+        if workers == 1 or len(jobs) <= 1:
+            computed = map(_run_cell, jobs)
+        else:
+            computed = stack.enter_context(ProcessPoolExecutor(max_workers=workers)).map(_run_cell, jobs)
+        # Cache each cell as soon as it arrives so an interrupted sweep keeps its progress
+        for index, row in zip(pending, computed):
+            rows[index] = row
+            if cache_dir:
+                _store_cached(cache_dir, _cell_key(cells[index], settings), row)
+
+    for row, preview in zip(rows, analytic):
+        row['analytic_avg_wait'] = preview['avg_wait']
+        row['occupancy'] = preview['occupancy']
+    return np.array([tuple(row[name] for name in SWEEP_DTYPE.names) for row in rows], dtype=SWEEP_DTYPE)
+
+
+def write_csv(table, file):
+    """Writes a sweep table as CSV to a path or an open text file."""
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "w", newline="") as f:
+            return write_csv(table, f)
+    writer = csv.writer(file)
+    writer.writerow(table.dtype.names)
+    writer.writerows(row.tolist() for row in table)
+
+
+def pivot(table, value='avg_wait', rows='max_service', columns='max_arrival'):
+    """Reshapes one metric of a sweep table into a 2-D grid for a heatmap.
+
+    Filter `table` down to a single value of the other parameters first
+    (e.g. table[table['tellers'] == 2]). Returns (row_values, column_values,
+    grid), with NaN where a combination was not evaluated.
+    """
+    row_values = np.unique(table[rows])
+    column_values = np.unique(table[columns])
+    grid = np.full((row_values.size, column_values.size), np.nan)
+    grid[np.searchsorted(row_values, table[rows]), np.searchsorted(column_values, table[columns])] = table[value]
+    return row_values, column_values, grid
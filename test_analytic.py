@@ -0,0 +1,46 @@
+# test_analytic.py
+#
+# Closed-form queue estimates (analytic.py) against textbook values.
+#
+# Run with `python -m pytest -q`.
+
+import math
+
+import pytest
+
+from analytic import erlang_c, gg_c, mg1, mmc
+
+
+def test_erlang_c_known_values():
+    assert erlang_c(0.5, 1) == pytest.approx(0.5)  # one server: the utilization
+    assert erlang_c(1, 2) == pytest.approx(1 / 3)
+    assert erlang_c(2, 3) == pytest.approx(4 / 9)
+    assert erlang_c(3, 3) == 1.0
+
+
+def test_mmc_known_waits():
+    # M/M/1 with rho = 0.5: Wq = rho / (mu - lambda) = 1
+    assert mmc(0.5, 1)['avg_wait'] == pytest.approx(1.0)
+    # M/M/2 with lambda = mu = 1: Wq = C / (c mu - lambda) = 1/3, Lq = lambda Wq
+    result = mmc(1, 1, 2)
+    assert result['avg_wait'] == pytest.approx(1 / 3)
+    assert result['queue_length'] == pytest.approx(1 / 3)
+    assert result['occupancy'] == pytest.approx(0.5)
+
+
+def test_mg1_pollaczek_khinchine():
+    # Exponential service reduces to M/M/1; deterministic service halves the wait
+    assert mg1(0.5, 1, 1)['avg_wait'] == pytest.approx(mmc(0.5, 1)['avg_wait'])
+    assert mg1(0.5, 1, 0)['avg_wait'] == pytest.approx(0.5)
+
+
+def test_gg_c_with_exponential_moments_is_mmc():
+    result = gg_c(2, 4, 1, 1, servers=1)
+    assert result['avg_wait'] == pytest.approx(mmc(0.5, 1)['avg_wait'])
+    assert not result['exact']
+
+
+@pytest.mark.parametrize('result', (mmc(1, 1), mmc(3, 1, 2), mg1(1, 1, 0)))
+def test_overloaded_queues_are_unstable(result):
+    assert not result['stable']
+    assert result['avg_wait'] == math.inf
@@ -0,0 +1,47 @@
+# test_batch.py
+#
+# The vectorized single-teller FIFO engine (batch.py) against hand-worked
+# waits and against Simulation on the same random draws.
+#
+# Run with `python -m pytest -q`.
+
+import random
+
+import pytest
+
+from batch import lindley_waits, simulate_fifo
+from simulation import Simulation, SimulationMode
+
+SEEDS = (1, 7, 42)
+# (max_arrival, max_service): light, near-saturated and overloaded
+LOADS = ((8, 3), (4, 5), (2, 8))
+
+
+def test_lindley_waits_by_hand():
+    # A teller freed at minute t starts the next customer at t + 1 (the handover)
+    assert lindley_waits([0, 1, 2, 10], [5, 5, 1, 1]).tolist() == [0, 5, 10, 4]
+    assert lindley_waits([0, 10, 20], [3, 3, 3]).tolist() == [0, 0, 0]
+    assert lindley_waits([], []).tolist() == []
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('mode', list(SimulationMode))
+def test_batch_engine_matches_simulation(seed, mode):
+    for max_arrival, max_service in LOADS:
+        duration = 600
+        simulation = Simulation(duration, max_arrival, max_service, mode=mode, rng=random.Random(seed),
+                                build_messages=False).run()
+        # Replay the shared stream in the engine's draw order: first gap, then service and next gap per arrival
+        rng = random.Random(seed)
+        arrival_times, service_times = [], []
+        time = rng.randint(1, max_arrival)
+        while time < duration:
+            arrival_times.append(time)
+            service_times.append(rng.randint(1, max_service))
+            time += rng.randint(1, max_arrival)
+
+        result = simulate_fifo(arrival_times, service_times, duration)
+        assert len(simulation.all_customers) == len(arrival_times)
+        served = [c.wait_time for c in simulation.all_customers if c.wait_time is not None]
+        assert result['wait_times'][result['served']].tolist() == served
+        assert result['total_busy_time'] == simulation.total_busy_time
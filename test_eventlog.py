@@ -0,0 +1,48 @@
+# test_eventlog.py
+#
+# The GUI's batched event log (eventlog.py), against a stand-in for the Tk Text widget.
+#
+# Run with `python -m pytest -q`.
+
+from eventlog import EventLog
+
+
+class FakeText:
+    def __init__(self):
+        self.chunks = []
+
+    def insert(self, index, *chunks):
+        self.chunks += chunks
+
+    def delete(self, *indices):
+        pass
+
+    def see(self, index):
+        pass
+
+    def messages(self):
+        return [chunk.rstrip('\n') for chunk in self.chunks[2::4]]
+
+
+class FullDisk:
+    def writelines(self, lines):
+        raise OSError(28, "No space left on device")
+
+    def close(self):
+        pass
+
+
+def test_formatter_survives_errors_and_stops_spilling():
+    text = FakeText()
+    log = EventLog(text)
+    log._spill = FullDisk()
+    log.add([("first", "summary")])
+    log.add([({'type': 'finish'}, "finish")])  # malformed event: no time or customer
+    log.add([("last", "summary")])
+    log.flush(wait=True)  # would block forever if the formatter thread had died
+    messages = text.messages()
+    assert messages[0] == "first"
+    assert messages[1].startswith("Stopped writing the log file")
+    assert messages[2].startswith("Log formatting failed")
+    assert messages[3] == "last"
+    assert log._spill is None
@@ -0,0 +1,37 @@
+# test_invariants.py
+#
+# The tick and event clocks must produce identical per-customer waits and
+# summaries whatever the seed, teller count, discipline and load.
+#
+# Run with `python -m pytest -q`.
+
+import pytest
+
+from queues import QueueDiscipline
+from simulation import Simulation, SimulationMode
+
+SEEDS = (1, 7, 42)
+TELLERS = (1, 2, 3)
+# (max_arrival, max_service): light, near-saturated and overloaded
+LOADS = ((8, 3), (4, 5), (2, 8))
+
+
+def _build(mode, seed, tellers, discipline, max_arrival=4, max_service=7, duration=600):
+    classes = 3 if discipline == QueueDiscipline.PRIORITY else 1
+    return Simulation(duration, max_arrival, max_service, mode=mode, tellers=tellers, discipline=discipline,
+                      priority_classes=classes, seed=seed, build_messages=False)
+
+
+def _waits(simulation):
+    return [(c.id, c.arrival_time, c.service_time, c.priority, c.wait_time) for c in simulation.all_customers]
+
+
+@pytest.mark.parametrize('discipline', list(QueueDiscipline))
+@pytest.mark.parametrize('tellers', TELLERS)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_tick_and_event_modes_agree(seed, tellers, discipline):
+    for max_arrival, max_service in LOADS:
+        tick = _build(SimulationMode.TICK, seed, tellers, discipline, max_arrival, max_service).run()
+        event = _build(SimulationMode.EVENT, seed, tellers, discipline, max_arrival, max_service).run()
+        assert _waits(event) == _waits(tick)
+        assert event.get_summary(10) == tick.get_summary(10)
@@ -0,0 +1,36 @@
+# test_processes.py
+#
+# Arrival and service processes (processes.py).
+#
+# Run with `python -m pytest -q`.
+
+import math
+
+import numpy as np
+import pytest
+
+from processes import parse_process
+from simulation import Simulation, SimulationMode
+
+
+@pytest.mark.parametrize('mode', list(SimulationMode))
+def test_schedule_that_closes_for_good_stops_arriving(mode):
+    arrivals = parse_process('schedule:0=0.5,60=0', 'arrivals', np.random.default_rng(1))
+    simulation = Simulation(120, 4, 5, mode=mode, arrivals=arrivals, seed=1).run()
+    assert len(simulation.all_customers) > 0
+    assert max(c.arrival_time for c in simulation.all_customers) < 61  # rounded to whole minutes
+    assert arrivals.next_gap(simulation.time) == math.inf
+
+
+def test_trailing_zero_rates_close_at_the_first_of_them():
+    arrivals = parse_process('schedule:0=0.2,30=0,90=0', 'arrivals', np.random.default_rng(2))
+    simulation = Simulation(240, 4, 5, mode=SimulationMode.EVENT, arrivals=arrivals, seed=1).run()
+    assert max(c.arrival_time for c in simulation.all_customers) < 31
+
+
+def test_repeating_schedule_reopens_after_a_closed_stretch():
+    arrivals = parse_process('schedule:0=0.5,60=0@120', 'arrivals', np.random.default_rng(3))
+    simulation = Simulation(480, 4, 5, mode=SimulationMode.EVENT, arrivals=arrivals, seed=1).run()
+    times = [c.arrival_time for c in simulation.all_customers]
+    assert any(120 <= t < 180 for t in times)
+    assert not any(61 < t < 120 for t in times)
@@ -0,0 +1,46 @@
+# test_replication.py
+#
+# Replication statistics (replication.py) against tabulated Student-t values.
+#
+# Run with `python -m pytest -q`.
+
+import math
+
+import pytest
+
+from replication import _t_cdf, confidence_interval, t_quantile
+
+# (p, df, quantile) from standard t tables
+T_TABLE = (
+    (0.975, 1, 12.7062), (0.975, 2, 4.3027), (0.975, 3, 3.1824), (0.975, 4, 2.7764),
+    (0.975, 9, 2.2622), (0.975, 10, 2.2281), (0.975, 30, 2.0423),
+    (0.995, 1, 63.6567), (0.995, 3, 5.8409), (0.995, 20, 2.8453),
+    (0.95, 2, 2.9200), (0.95, 5, 2.0150),
+)
+
+
+@pytest.mark.parametrize('p, df, expected', T_TABLE)
+def test_t_quantile_matches_tables(p, df, expected):
+    assert t_quantile(p, df) == pytest.approx(expected, abs=5e-4)
+    assert t_quantile(1 - p, df) == pytest.approx(-expected, abs=5e-4)
+
+
+def test_t_quantile_tends_to_the_normal():
+    assert t_quantile(0.975, math.inf) == pytest.approx(1.95996, abs=1e-5)
+
+
+@pytest.mark.parametrize('df', (1, 2, 3, 4, 7))
+def test_t_cdf_closed_forms(df):
+    assert _t_cdf(0.0, df) == pytest.approx(0.5)
+    for p in (0.9, 0.975, 0.995):
+        assert _t_cdf(t_quantile(p, df), df) == pytest.approx(p, abs=1e-10)
+    # df=1 is the Cauchy distribution
+    if df == 1:
+        assert _t_cdf(1.0, 1) == pytest.approx(0.75)
+
+
+def test_confidence_interval_of_two_values_uses_df_one():
+    interval = confidence_interval([1, 2])
+    assert interval['mean'] == 1.5
+    assert interval['half_width'] == pytest.approx(12.7062 * math.sqrt(0.5) / math.sqrt(2), abs=1e-3)
+    assert confidence_interval([5])['half_width'] == math.inf
@@ -0,0 +1,39 @@
+# test_runner.py
+#
+# Off-thread runners (runner.py).
+#
+# Run with `python -m pytest -q`.
+
+import time
+
+from runner import SimulationProcess
+from simulation import Simulation, SimulationState
+
+
+def _drain_until_final(runner, timeout=30):
+    batches = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        batches += runner.drain()
+        if batches and batches[-1]['final']:
+            return batches
+        time.sleep(0.01)
+    raise AssertionError("no final batch")
+
+
+def test_process_runner_matches_a_direct_run():
+    simulation = Simulation(20_000, 4, 3, seed=5, build_messages=False)
+    batches = _drain_until_final(SimulationProcess(simulation, 10, steps_per_batch=None).start())
+    reference = Simulation(20_000, 4, 3, seed=5, build_messages=False).run()
+    assert batches[-1]['state'] == SimulationState.FINISHED
+    assert batches[-1]['summary'] == reference.get_summary(10)
+    finished = [customer for batch in batches for customer in batch['finished']]
+    assert [customer.id for customer in finished[:50]] == list(range(1, 51))
+
+
+def test_drain_after_stop_returns_nothing_instead_of_blocking():
+    runner = SimulationProcess(Simulation(10**6, 4, 3, build_messages=False), 10, steps_per_batch=None).start()
+    time.sleep(0.5)
+    runner.stop()
+    runner._process.join(10)
+    assert runner.drain() == []
@@ -0,0 +1,56 @@
+# test_snapshot.py
+#
+# Checkpoints (snapshot.py): a snapshot taken at any point resumes to exactly
+# the uninterrupted run, and overrides change only what they name.
+#
+# Run with `python -m pytest -q`.
+
+import pytest
+
+import snapshot
+from queues import QueueDiscipline
+from simulation import Simulation, SimulationMode, SimulationState
+
+TELLERS = (1, 2, 3)
+
+
+def _build(mode, seed, tellers, discipline, duration=600):
+    classes = 3 if discipline == QueueDiscipline.PRIORITY else 1
+    return Simulation(duration, 4, 7, mode=mode, tellers=tellers, discipline=discipline,
+                      priority_classes=classes, seed=seed, build_messages=False)
+
+
+def _waits(simulation):
+    return [(c.id, c.arrival_time, c.service_time, c.priority, c.wait_time) for c in simulation.all_customers]
+
+
+@pytest.mark.parametrize('discipline', list(QueueDiscipline))
+@pytest.mark.parametrize('tellers', TELLERS)
+@pytest.mark.parametrize('mode', list(SimulationMode))
+def test_snapshot_resumes_exactly(mode, tellers, discipline):
+    seed = 1
+    full = _build(mode, seed, tellers, discipline).run()
+    for cut in (0, 37, 300, 600):
+        part = _build(mode, seed, tellers, discipline)
+        while part.state == SimulationState.RUNNING and part.time < cut:
+            part.step()
+        resumed = snapshot.restore(snapshot.snapshot(part)).run()
+        assert _waits(resumed) == _waits(full)
+        assert resumed.get_summary(10) == full.get_summary(10)
+        # Taking the snapshot must not disturb the original run either
+        assert _waits(part.run()) == _waits(full)
+
+
+@pytest.mark.parametrize('mode', list(SimulationMode))
+def test_longer_duration_extends_a_finished_run(mode):
+    finished = _build(mode, 3, 2, QueueDiscipline.FIFO, duration=300).run()
+    extended = snapshot.restore(snapshot.snapshot(finished), duration=900).run()
+    assert _waits(extended) == _waits(_build(mode, 3, 2, QueueDiscipline.FIFO, duration=900).run())
+
+
+def test_restore_rejects_foreign_data_and_fixed_settings():
+    data = snapshot.snapshot(_build(SimulationMode.EVENT, 1, 1, QueueDiscipline.FIFO))
+    with pytest.raises(ValueError):
+        snapshot.restore(b"JUNK" + data[4:])
+    with pytest.raises(ValueError):
+        snapshot.restore(data, tellers=2)
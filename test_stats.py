@@ -0,0 +1,82 @@
+# test_stats.py
+#
+# Running statistics (stats.py) against exact values computed from the full
+# sample, and QueueTimeline against minute-by-minute averages.
+#
+# Run with `python -m pytest -q`.
+
+import numpy as np
+import pytest
+
+from stats import WAIT_COUNT_LIMIT, P2Quantile, QueueTimeline, RunningStats
+
+
+def _sketch(p, values):
+    sketch = P2Quantile(p)
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+@pytest.mark.parametrize('p', (0.5, 0.95, 0.99))
+def test_p2_quantile_tracks_the_exact_quantile(p):
+    rng = np.random.default_rng(1)
+    for values in (rng.uniform(0, 1, 20_000), rng.exponential(5, 20_000)):
+        exact = np.quantile(values, p)
+        assert _sketch(p, values.tolist()).value() == pytest.approx(exact, rel=0.03)
+
+
+@pytest.mark.parametrize('values', ([], [7], [3, 1], [4, 1, 3, 2, 5]))
+def test_p2_quantile_is_exact_for_five_or_fewer_values(values):
+    for p in (0.5, 0.95):
+        expected = np.quantile(values, p) if values else 0
+        assert _sketch(p, values).value() == pytest.approx(expected)
+
+
+def test_p2_quantile_of_a_constant_is_that_constant():
+    assert _sketch(0.95, [4] * 1000).value() == 4
+
+
+def test_running_stats_aggregates_and_stressed_counts():
+    waits = [0, 3, 12, 12, 40, WAIT_COUNT_LIMIT + 5, 3 * WAIT_COUNT_LIMIT]
+    stats = RunningStats(waits=waits)
+    for wait in waits:
+        stats.add_wait(wait)
+    assert (stats.count, stats.total_wait, stats.max_wait) == (len(waits), sum(waits), max(waits))
+    assert stats.long_waits == 2
+    for threshold in (10, 12, 0, WAIT_COUNT_LIMIT - 1, WAIT_COUNT_LIMIT + 5, 10 * WAIT_COUNT_LIMIT, 10):
+        assert stats.stressed_count(threshold) == sum(wait > threshold for wait in waits)
+
+
+def test_queue_timeline_merges_buckets_by_hand():
+    timeline = QueueTimeline(tellers=1, max_buckets=4)
+    timeline.update(0, 2, 1)
+    timeline.update(3, 0, 0)
+    timeline.update(8, 5, 1)  # past 4 one-minute buckets: merged twice, to 4 minutes wide
+    series = timeline.series(10)
+    assert timeline.width == 4
+    assert series['start'] == [0, 4, 8]
+    assert series['end'] == [4, 8, 10]
+    assert series['queue_length'] == [1.5, 0, 5]
+    assert series['in_system'] == [2.25, 0, 6]
+    assert series['busy_fraction'] == [0.75, 0, 1]
+    assert series['queue_peak'] == [2, 0, 5]
+
+
+def test_queue_timeline_matches_minute_by_minute_averages():
+    rng = np.random.default_rng(4)
+    tellers, horizon = 3, 5000
+    timeline = QueueTimeline(tellers, max_buckets=16)
+    queue_length, busy = np.zeros(horizon, int), np.zeros(horizon, int)
+    changes = np.sort(rng.choice(horizon, 400, replace=False))
+    for time in changes:
+        length, serving = int(rng.integers(0, 30)), int(rng.integers(0, tellers + 1))
+        timeline.update(int(time), length, serving)
+        queue_length[time:], busy[time:] = length, serving
+    series = timeline.series(horizon)
+    assert len(series['start']) <= 16
+    for start, end, average, in_system, fraction, peak in zip(*series.values()):
+        assert average == pytest.approx(queue_length[start:end].mean())
+        assert in_system == pytest.approx((queue_length + busy)[start:end].mean())
+        assert fraction == pytest.approx(busy[start:end].mean() / tellers)
+        assert peak == queue_length[start:end].max()
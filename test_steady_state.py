@@ -0,0 +1,46 @@
+# test_steady_state.py
+#
+# Warm-up truncation and batch means (steady_state.py) on series with known answers.
+#
+# Run with `python -m pytest -q`.
+
+import math
+import statistics
+
+import numpy as np
+import pytest
+
+from replication import t_quantile
+from steady_state import batch_means, mser5
+
+
+def test_mser5_cuts_exactly_a_clear_warm_up():
+    steady = [0, 2] * 475
+    assert mser5([100] * 50 + steady) == 50
+    assert mser5(list(range(100, 0, -2)) + steady) == 50  # a decaying start
+
+
+def test_mser5_keeps_a_stationary_series():
+    values = np.random.default_rng(2).exponential(5, 5000)
+    assert mser5(values) < 250
+    assert mser5([3] * 1000) == 0
+
+
+def test_mser5_needs_two_batches():
+    assert mser5([]) == 0
+    assert mser5([1, 2, 3, 4, 5, 6, 7, 8, 9]) == 0
+
+
+def test_batch_means_by_hand():
+    # 103 values in 4 batches of 25; the last 3 do not fill a batch and are dropped
+    result = batch_means(list(range(103)), batches=4)
+    averages = [12, 37, 62, 87]
+    assert (result['batches'], result['batch_size']) == (4, 25)
+    assert result['mean'] == pytest.approx(49.5)
+    assert result['half_width'] == pytest.approx(t_quantile(0.975, 3) * statistics.stdev(averages) / 2)
+
+
+def test_batch_means_with_too_few_values():
+    result = batch_means([1, 2, 3], batches=20)
+    assert result['batch_size'] == 0
+    assert result['half_width'] == math.inf